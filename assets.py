@@ -0,0 +1,52 @@
+# assets.py
+"""
+Lazily loaded pyglet resources for the chess GUI.
+
+Nothing here imports pyglet or touches the disk until an image is first
+requested, so modules that only need the rules can be imported on machines
+without a display.
+"""
+
+_images = {}
+_spritesheet = None
+
+
+def image(path):
+    """
+    Load an image through pyglet.resource on first use and cache it.
+    Args:
+        path (str): Resource path, e.g. 'resources/chessboard.png'.
+    Returns:
+        pyglet.image.AbstractImage: The loaded image.
+    """
+    if path not in _images:
+        import pyglet
+        _images[path] = pyglet.resource.image(path)
+    return _images[path]
+
+
+def spritesheet():
+    """
+    Return the 2x6 grid of piece images, loading it on first use.
+    Returns:
+        pyglet.image.ImageGrid: Piece images indexed by the Pieces constants.
+    """
+    global _spritesheet
+    if _spritesheet is None:
+        import pyglet
+        _spritesheet = pyglet.image.ImageGrid(image('resources/spritesheet.png'), 2, 6)
+    return _spritesheet
+
+
+def sprite(img, x, y):
+    """
+    Create a pyglet sprite without importing pyglet at module import time.
+    Args:
+        img (pyglet.image.AbstractImage): Image to display.
+        x (float): Window x coordinate.
+        y (float): Window y coordinate.
+    Returns:
+        pyglet.sprite.Sprite: The new sprite.
+    """
+    import pyglet
+    return pyglet.sprite.Sprite(img, x, y)
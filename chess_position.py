@@ -0,0 +1,318 @@
+# chess_position.py
+"""
+Plain-data chess position used by the chess GUI.
+
+Squares are integers 0-63 numbered row * 8 + column, with row 0 being White's
+back rank (the same orientation as guiChess.Chess.board[row][column]). Pieces
+are small integers, positive for White and negative for Black. Nothing here
+depends on pyglet, so move generation, check detection and castling run
+headless; the GUI syncs its sprites from this model. Positions carry an
+incrementally updated Zobrist hash for search transposition tables.
+"""
+
+import random
+
+EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(7)
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+
+BACK_RANK = (ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK)
+
+KNIGHT_STEPS = ((2, 1), (2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2), (-2, 1), (-2, -1))
+KING_STEPS = ((1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1))
+ROOK_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+BISHOP_DIRECTIONS = ((-1, -1), (1, 1), (1, -1), (-1, 1))
+
+# Castling rights lost when a piece leaves or is captured on these squares
+CASTLING_MASKS = {0: WHITE_QUEENSIDE, 4: WHITE_KINGSIDE | WHITE_QUEENSIDE, 7: WHITE_KINGSIDE,
+                  56: BLACK_QUEENSIDE, 60: BLACK_KINGSIDE | BLACK_QUEENSIDE, 63: BLACK_KINGSIDE}
+
+
+def square(row, col):
+    """Convert (row, column) coordinates to a square index."""
+    return row * 8 + col
+
+
+def _step_targets(steps):
+    targets = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        targets.append(tuple(square(row + dr, col + dc) for dr, dc in steps
+                             if 0 <= row + dr < 8 and 0 <= col + dc < 8))
+    return tuple(targets)
+
+
+def _rays(directions):
+    rays = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        sq_rays = []
+        for dr, dc in directions:
+            ray = []
+            r, c = row + dr, col + dc
+            while 0 <= r < 8 and 0 <= c < 8:
+                ray.append(square(r, c))
+                r += dr
+                c += dc
+            sq_rays.append(tuple(ray))
+        rays.append(tuple(sq_rays))
+    return tuple(rays)
+
+
+KNIGHT_TARGETS = _step_targets(KNIGHT_STEPS)
+KING_TARGETS = _step_targets(KING_STEPS)
+ROOK_RAYS = _rays(ROOK_DIRECTIONS)
+BISHOP_RAYS = _rays(BISHOP_DIRECTIONS)
+
+# Zobrist keys: one per (piece code, square), one per castling-rights value and
+# one for Black to move. Fixed seed so hashes are stable across runs.
+_zobrist_random = random.Random(0x43686573)
+PIECE_KEYS = {code: [_zobrist_random.getrandbits(64) for _ in range(64)]
+              for code in range(-KING, KING + 1) if code != EMPTY}
+CASTLING_KEYS = [_zobrist_random.getrandbits(64) for _ in range(ALL_CASTLING + 1)]
+BLACK_TO_MOVE_KEY = _zobrist_random.getrandbits(64)
+
+
+class Position(object):
+    """
+    A chess position: piece placement, side to move, castling rights and
+    king squares. Moves are (from_square, to_square) pairs.
+    """
+
+    def __init__(self):
+        self.squares = [EMPTY] * 64
+        for col, kind in enumerate(BACK_RANK):
+            self.squares[square(0, col)] = kind
+            self.squares[square(1, col)] = PAWN
+            self.squares[square(6, col)] = -PAWN
+            self.squares[square(7, col)] = -kind
+        self.white_to_move = True
+        self.castling = ALL_CASTLING
+        self.king_squares = {True: square(0, 4), False: square(7, 4)}
+        self.hash = self.compute_hash()
+
+    def compute_hash(self):
+        """Zobrist hash of the position computed from scratch."""
+        key = CASTLING_KEYS[self.castling]
+        for sq, piece in enumerate(self.squares):
+            if piece != EMPTY:
+                key ^= PIECE_KEYS[piece][sq]
+        if not self.white_to_move:
+            key ^= BLACK_TO_MOVE_KEY
+        return key
+
+    def copy(self):
+        """Return an independent copy of this position."""
+        other = Position.__new__(Position)
+        other.squares = self.squares[:]
+        other.white_to_move = self.white_to_move
+        other.castling = self.castling
+        other.king_squares = dict(self.king_squares)
+        other.hash = self.hash
+        return other
+
+    def piece_at(self, sq):
+        """Return the piece code on a square (0 when empty)."""
+        return self.squares[sq]
+
+    def _slide(self, sq, rays, white, targets):
+        squares = self.squares
+        for ray in rays[sq]:
+            for target in ray:
+                piece = squares[target]
+                if piece == EMPTY:
+                    targets.append(target)
+                else:
+                    if (piece > 0) != white:
+                        targets.append(target)
+                    break
+
+    def threat_squares(self, sq):
+        """
+        Pseudo-legal destinations for the piece on a square, ignoring whether
+        the move leaves its own king in check and excluding castling.
+        Args:
+            sq (int): Square of the piece.
+        Returns:
+            list: Destination squares.
+        """
+        squares = self.squares
+        piece = squares[sq]
+        if piece == EMPTY:
+            return []
+        white = piece > 0
+        kind = abs(piece)
+        targets = []
+        if kind == PAWN:
+            row, col = divmod(sq, 8)
+            forward, start_row = (1, 1) if white else (-1, 6)
+            next_row = row + forward
+            if 0 <= next_row < 8:
+                ahead = square(next_row, col)
+                if squares[ahead] == EMPTY:
+                    targets.append(ahead)
+                    if row == start_row and squares[ahead + 8 * forward] == EMPTY:
+                        targets.append(ahead + 8 * forward)
+                for dc in (1, -1):
+                    if 0 <= col + dc < 8:
+                        target = ahead + dc
+                        if squares[target] != EMPTY and (squares[target] > 0) != white:
+                            targets.append(target)
+        elif kind == KNIGHT or kind == KING:
+            for target in (KNIGHT_TARGETS if kind == KNIGHT else KING_TARGETS)[sq]:
+                if squares[target] == EMPTY or (squares[target] > 0) != white:
+                    targets.append(target)
+        else:
+            if kind != BISHOP:
+                self._slide(sq, ROOK_RAYS, white, targets)
+            if kind != ROOK:
+                self._slide(sq, BISHOP_RAYS, white, targets)
+        return targets
+
+    def is_attacked(self, sq, by_white):
+        """
+        Check whether a square is attacked by the given side.
+        Args:
+            sq (int): Square to test.
+            by_white (bool): True to test White's attacks, False for Black's.
+        Returns:
+            bool: True if any piece of that side attacks the square.
+        """
+        squares = self.squares
+        sign = 1 if by_white else -1
+        row, col = divmod(sq, 8)
+        # Pawns attack diagonally forward, so look one row behind the square
+        pawn_row = row - sign
+        if 0 <= pawn_row < 8:
+            for dc in (1, -1):
+                if 0 <= col + dc < 8 and squares[square(pawn_row, col + dc)] == sign * PAWN:
+                    return True
+        for target in KNIGHT_TARGETS[sq]:
+            if squares[target] == sign * KNIGHT:
+                return True
+        for target in KING_TARGETS[sq]:
+            if squares[target] == sign * KING:
+                return True
+        for rays, kind in ((ROOK_RAYS, ROOK), (BISHOP_RAYS, BISHOP)):
+            for ray in rays[sq]:
+                for target in ray:
+                    piece = squares[target]
+                    if piece != EMPTY:
+                        if piece == sign * kind or piece == sign * QUEEN:
+                            return True
+                        break
+        return False
+
+    def in_check(self, white):
+        """Check whether the given side's king is attacked."""
+        return self.is_attacked(self.king_squares[white], not white)
+
+    def make_move(self, from_sq, to_sq, promotion=QUEEN):
+        """
+        Play a move without checking legality.
+        Args:
+            from_sq (int): Square of the moving piece.
+            to_sq (int): Destination square.
+            promotion (int): Piece kind a pawn promotes to on the last row.
+        Returns:
+            tuple: Undo information for unmake_move.
+        """
+        squares = self.squares
+        piece = squares[from_sq]
+        captured = squares[to_sq]
+        undo = (from_sq, to_sq, piece, captured, self.castling, self.hash)
+        key = self.hash ^ PIECE_KEYS[piece][from_sq]
+        if captured != EMPTY:
+            key ^= PIECE_KEYS[captured][to_sq]
+        squares[to_sq] = piece
+        squares[from_sq] = EMPTY
+        kind = abs(piece)
+        if kind == KING:
+            self.king_squares[piece > 0] = to_sq
+            if to_sq - from_sq == 2:
+                rook = squares[from_sq + 3]
+                squares[from_sq + 1] = rook
+                squares[from_sq + 3] = EMPTY
+                key ^= PIECE_KEYS[rook][from_sq + 3] ^ PIECE_KEYS[rook][from_sq + 1]
+            elif from_sq - to_sq == 2:
+                rook = squares[from_sq - 4]
+                squares[from_sq - 1] = rook
+                squares[from_sq - 4] = EMPTY
+                key ^= PIECE_KEYS[rook][from_sq - 4] ^ PIECE_KEYS[rook][from_sq - 1]
+        elif kind == PAWN and to_sq // 8 in (0, 7):
+            squares[to_sq] = promotion if piece > 0 else -promotion
+        key ^= PIECE_KEYS[squares[to_sq]][to_sq] ^ CASTLING_KEYS[self.castling]
+        self.castling &= ~(CASTLING_MASKS.get(from_sq, 0) | CASTLING_MASKS.get(to_sq, 0))
+        self.hash = key ^ CASTLING_KEYS[self.castling] ^ BLACK_TO_MOVE_KEY
+        self.white_to_move = not self.white_to_move
+        return undo
+
+    def unmake_move(self, undo):
+        """Take back a move played with make_move."""
+        from_sq, to_sq, piece, captured, castling, key = undo
+        squares = self.squares
+        squares[from_sq] = piece
+        squares[to_sq] = captured
+        if abs(piece) == KING:
+            self.king_squares[piece > 0] = from_sq
+            if to_sq - from_sq == 2:
+                squares[from_sq + 3] = squares[from_sq + 1]
+                squares[from_sq + 1] = EMPTY
+            elif from_sq - to_sq == 2:
+                squares[from_sq - 4] = squares[from_sq - 1]
+                squares[from_sq - 1] = EMPTY
+        self.castling = castling
+        self.hash = key
+        self.white_to_move = not self.white_to_move
+
+    def _castling_moves(self, sq, white):
+        squares = self.squares
+        targets = []
+        kingside, queenside = (WHITE_KINGSIDE, WHITE_QUEENSIDE) if white else (BLACK_KINGSIDE, BLACK_QUEENSIDE)
+        enemy = not white
+        if self.castling & kingside and squares[sq + 1] == EMPTY and squares[sq + 2] == EMPTY:
+            if not any(self.is_attacked(s, enemy) for s in (sq, sq + 1, sq + 2)):
+                targets.append(sq + 2)
+        if self.castling & queenside and squares[sq - 1] == EMPTY and squares[sq - 2] == EMPTY \
+                and squares[sq - 3] == EMPTY:
+            if not any(self.is_attacked(s, enemy) for s in (sq, sq - 1, sq - 2)):
+                targets.append(sq - 2)
+        return targets
+
+    def legal_moves_from(self, sq):
+        """
+        Legal destinations for the side to move's piece on a square.
+        Args:
+            sq (int): Square of the piece.
+        Returns:
+            list: Destination squares (empty for other squares).
+        """
+        piece = self.squares[sq]
+        white = self.white_to_move
+        if piece == EMPTY or (piece > 0) != white:
+            return []
+        moves = []
+        for target in self.threat_squares(sq):
+            undo = self.make_move(sq, target)
+            if not self.in_check(white):
+                moves.append(target)
+            self.unmake_move(undo)
+        if abs(piece) == KING:
+            moves.extend(self._castling_moves(sq, white))
+        return moves
+
+    def legal_moves(self):
+        """
+        All legal moves for the side to move.
+        Returns:
+            dict: Square -> list of destination squares, for pieces that can move.
+        """
+        white = self.white_to_move
+        moves = {}
+        for sq, piece in enumerate(self.squares):
+            if piece != EMPTY and (piece > 0) == white:
+                targets = self.legal_moves_from(sq)
+                if targets:
+                    moves[sq] = targets
+        return moves
@@ -1,10 +1,16 @@
+import argparse
+
 from guiChess import Chess, pyglet
 
 def main():
-    mygame = Chess()
+    parser = argparse.ArgumentParser(description="Play chess.")
+    parser.add_argument('--ai', choices=('white', 'black'), help="Side played by the computer.")
+    parser.add_argument('--ai-time', type=float, default=1.0, help="Seconds the computer thinks per move.")
+    args = parser.parse_args()
+    mygame = Chess(None if args.ai is None else args.ai == 'white', args.ai_time)
     pyglet.clock.schedule_interval(mygame.update, 1 / 60.)
     pyglet.app.run()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,156 @@
+# analyse.py
+"""
+Analyse a file of positions in parallel and stream the results.
+
+Input is one position per line in Board.to_fen format; blank lines and
+lines starting with '#' are skipped. Each position produces one JSON line
+with its index, best move, score (White's perspective), principal
+variation, nodes and completed depth, written in input order:
+
+    python analyse.py positions.txt --depth 4 --output results.jsonl
+    python analyse.py positions.txt --time 0.5 --output results.jsonl --resume
+
+Only a bounded window of positions is in flight at a time, so memory use
+does not grow with the size of the input. With --resume the positions
+already in the output file are skipped and new results are appended.
+"""
+
+import argparse
+import collections
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from board import Board
+from makruk_game import format_square
+from search import Searcher, INFINITY, SEARCH_OPTIONS
+
+CHUNK_BYTES = 1 << 16  # Read size when scanning an output file to resume
+
+
+def format_move(move):
+    return format_square(move[0]) + format_square(move[1])
+
+
+def analyse_position(index, fen, depth, time_limit=None, options=None, pv_length=8):
+    """
+    Search one position.
+    Args:
+        index (int): Position number in the input, echoed in the result.
+        fen (str): Position in Board.to_fen format.
+        depth (int): Search depth, or the depth cap of a timed search.
+        time_limit (float): Seconds per position, or None for a fixed-depth search.
+        options (dict): Searcher options.
+        pv_length (int): Longest principal variation to report.
+    Returns:
+        dict: The result line, with an 'error' field for an invalid position.
+    """
+    try:
+        board, color = Board.from_fen(fen)
+    except ValueError as e:
+        return {'index': index, 'fen': fen, 'error': str(e)}
+    searcher = Searcher(board, **(options or {}))
+    score, move = searcher.search(depth, color, time_limit)
+    pv = searcher.principal_variation(color, pv_length, move) if move else []
+    return {
+        'index': index,
+        'fen': fen,
+        'move': format_move(move) if move else None,
+        'score': score if abs(score) != INFINITY else None,
+        'pv': [format_move(pv_move) for pv_move in pv],
+        'nodes': searcher.nodes,
+        'depth': searcher.completed_depth,
+    }
+
+
+def read_positions(lines):
+    """Yield (index, fen) for the position lines of an input file."""
+    index = 0
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield index, line
+            index += 1
+
+
+def completed_results(path):
+    """
+    Count the complete result lines in an output file, dropping a partly
+    written last line left by an interruption.
+    Returns:
+        int: Number of positions already analysed.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        # Find the end of the last complete line, reading back from the end of the file
+        size = end = f.seek(0, os.SEEK_END)
+        while end:
+            start = max(0, end - CHUNK_BYTES)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            end = start
+        if end != size:
+            f.truncate(end)
+        f.seek(0)
+        lines = 0
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b''):
+            lines += chunk.count(b'\n')
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse a file of positions in parallel.")
+    parser.add_argument('input', help="Positions file, or '-' for standard input.")
+    parser.add_argument('--output', help="Results file (JSON lines); standard output if omitted.")
+    parser.add_argument('--resume', action='store_true', help="Skip positions already in the output file.")
+    parser.add_argument('--depth', type=int,
+                        help="Search depth (default 3), or the depth cap with --time (default none).")
+    parser.add_argument('--time', type=float, help="Seconds per position instead of a fixed depth.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--window', type=int, help="Positions in flight (default 4 per worker).")
+    parser.add_argument('--pv-length', type=int, default=8)
+    for option in SEARCH_OPTIONS:
+        parser.add_argument('--' + option.replace('_', '-'), action='store_true',
+                            help=f"Enable the {option} search option.")
+    args = parser.parse_args()
+    if args.resume and not args.output:
+        parser.error("--resume needs --output.")
+
+    depth = args.depth or (3 if args.time is None else 64)
+    options = {option: True for option in SEARCH_OPTIONS if getattr(args, option)}
+    window = args.window or 4 * args.workers
+    done = completed_results(args.output) if args.resume else 0
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    out = open(args.output, 'a' if args.resume else 'w') if args.output else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            pending = collections.deque()
+
+            def write_oldest():
+                out.write(json.dumps(pending.popleft().result()) + '\n')
+                out.flush()
+
+            for index, fen in read_positions(source):
+                if index < done:
+                    continue
+                pending.append(pool.submit(analyse_position, index, fen, depth, args.time,
+                                           options, args.pv_length))
+                if len(pending) >= window:
+                    write_oldest()
+            while pending:
+                write_oldest()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
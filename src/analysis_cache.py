@@ -0,0 +1,118 @@
+# analysis_cache.py
+"""
+Persistent analysis cache backed by SQLite.
+
+Maps (position hash, side to move, search depth, engine configuration) to
+the score and best move found by a search, so positions that recur across
+games and restarts are not searched again. The configuration is a
+fingerprint of everything else that changes the result, the evaluator and
+the search options (see engine.search_config), so a result is only reused
+by the same engine. Entries are evicted least recently used first once the
+cache holds more than max_entries rows.
+"""
+
+import sqlite3
+
+_SIGN_BIT = 1 << 63
+
+
+def _to_signed(key):
+    # SQLite integers are signed 64-bit
+    return key - (1 << 64) if key >= _SIGN_BIT else key
+
+
+def _encode_move(move):
+    if move is None:
+        return None
+    (x1, y1), (x2, y2) = move
+    return ((x1 * 8 + y1) << 6) | (x2 * 8 + y2)
+
+
+def _decode_move(code):
+    if code is None:
+        return None
+    from_square, to_square = divmod(code, 64)
+    return divmod(from_square, 8), divmod(to_square, 8)
+
+
+class AnalysisCache:
+    """
+    On-disk map from searched positions to their results.
+    Args:
+        path (str): SQLite database file, created if missing.
+        max_entries (int): Size cap; older entries are evicted beyond it.
+    """
+
+    def __init__(self, path, max_entries=1000000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(analysis)")]
+        if columns and 'config' not in columns:
+            # Written before results were keyed by configuration; their engine is unknown
+            self.connection.execute("DROP TABLE analysis")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            " hash INTEGER NOT NULL, side INTEGER NOT NULL, depth INTEGER NOT NULL, config INTEGER NOT NULL,"
+            " score REAL NOT NULL, move INTEGER, last_used INTEGER NOT NULL,"
+            " PRIMARY KEY (hash, side, depth, config))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS analysis_lru ON analysis (last_used)")
+        self.connection.commit()
+        row = self.connection.execute("SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM analysis").fetchone()
+        self.clock, self.entries = row
+
+    def get(self, position_hash, color, depth, config=0):
+        """
+        Look up a previous search result.
+        Args:
+            position_hash (int): Board.position_hash of the position.
+            color (str): Side to move, 'white' or 'black'.
+            depth (int): Search depth the result must have been computed at.
+            config (int): 64-bit fingerprint of the engine configuration.
+        Returns:
+            tuple or None: (score, best move) or None on a miss.
+        """
+        key = (_to_signed(position_hash), color == 'white', depth, _to_signed(config))
+        row = self.connection.execute(
+            "SELECT score, move FROM analysis WHERE hash = ? AND side = ? AND depth = ? AND config = ?",
+            key).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.connection.execute(
+            "UPDATE analysis SET last_used = ? WHERE hash = ? AND side = ? AND depth = ? AND config = ?",
+            (self.clock,) + key)
+        self.connection.commit()
+        return row[0], _decode_move(row[1])
+
+    def put(self, position_hash, color, depth, score, move, config=0):
+        """Store a search result, evicting the least recently used entries if over the cap."""
+        self.clock += 1
+        key = (_to_signed(position_hash), color == 'white', depth, _to_signed(config))
+        cursor = self.connection.execute(
+            "UPDATE analysis SET score = ?, move = ?, last_used = ?"
+            " WHERE hash = ? AND side = ? AND depth = ? AND config = ?",
+            (score, _encode_move(move), self.clock) + key)
+        if cursor.rowcount == 0:
+            self.connection.execute(
+                "INSERT INTO analysis (hash, side, depth, config, score, move, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (score, _encode_move(move), self.clock))
+            self.entries += 1
+        if self.entries > self.max_entries:
+            # Trim a little below the cap so eviction does not run on every insert
+            excess = self.entries - self.max_entries + self.max_entries // 100
+            self.connection.execute(
+                "DELETE FROM analysis WHERE rowid IN (SELECT rowid FROM analysis ORDER BY last_used LIMIT ?)",
+                (excess,))
+            self.entries -= excess
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
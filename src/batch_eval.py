@@ -0,0 +1,150 @@
+# batch_eval.py
+"""
+Vectorized evaluation of many positions at once with NumPy.
+
+Positions are packed into an (N, 8, 8) int8 array indexed [n, x, y] like
+Board.grid, holding PIECE_CODES values: positive for White, negative for
+Black, 0 for empty squares. evaluate_batch reproduces Board.evaluate_board,
+including the exact mobility term, to within TOLERANCE (the only difference
+is floating-point summation order).
+
+NumPy is only needed by this module; the rest of the engine does not import it.
+"""
+
+import numpy as np
+
+from board import PIECE_VALUES, PIECE_CODES, CENTER_BONUS, EDGE_PENALTY, MOBILITY_WEIGHT
+from pieces import Khun, Met, Rua, Ma, Khon, Bia
+
+TOLERANCE = 1e-9
+
+KHUN, MET, RUA, MA, KHON, BIA = (PIECE_CODES[piece_type] for piece_type in (Khun, Met, Rua, Ma, Khon, Bia))
+
+# Value of each signed code, indexed by code + 6
+VALUE_TABLE = np.zeros(13)
+for _piece_type, _code in PIECE_CODES.items():
+    VALUE_TABLE[6 + _code] = PIECE_VALUES[_piece_type]
+    VALUE_TABLE[6 - _code] = -PIECE_VALUES[_piece_type]
+
+_rows, _cols = np.indices((8, 8))
+CENTER_MASK = (_rows >= 2) & (_rows <= 5) & (_cols >= 2) & (_cols <= 5)
+EDGE_MASK = (_rows == 0) | (_rows == 7) | (_cols == 0) | (_cols == 7)
+POSITIONAL_TABLE = CENTER_BONUS * CENTER_MASK - EDGE_PENALTY * EDGE_MASK
+
+KING_STEPS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+DIAGONAL_STEPS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+KNIGHT_STEPS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def pack_boards(boards):
+    """
+    Pack boards into an int8 array.
+    Args:
+        boards (iterable): Board instances.
+    Returns:
+        np.ndarray: (N, 8, 8) int8 array of piece codes.
+    """
+    boards = list(boards)
+    packed = np.zeros((len(boards), 8, 8), dtype=np.int8)
+    for n, board in enumerate(boards):
+        for color, sign in (('white', 1), ('black', -1)):
+            for (x, y), piece in board.pieces[color].items():
+                packed[n, x, y] = sign * PIECE_CODES[type(piece)]
+    return packed
+
+
+def _shift(array, dx, dy, fill):
+    """Return out with out[..., x, y] = array[..., x + dx, y + dy], or fill off the board."""
+    out = np.full_like(array, fill)
+    src_x = slice(max(dx, 0), 8 + min(dx, 0))
+    dst_x = slice(max(-dx, 0), 8 + min(-dx, 0))
+    src_y = slice(max(dy, 0), 8 + min(dy, 0))
+    dst_y = slice(max(-dy, 0), 8 + min(-dy, 0))
+    out[..., dst_x, dst_y] = array[..., src_x, src_y]
+    return out
+
+
+def _side_mobility(packed, sign):
+    """Count the moves available to one side's pieces, per position."""
+    relative = packed * sign  # This side's pieces are positive
+    own = relative > 0
+    empty = packed == 0
+    enemy = relative < 0
+    # Squares a piece may land on by stepping; off-board squares count as own
+    landable = ~own
+    counts = np.zeros(packed.shape[0], dtype=np.int64)
+
+    def count_steps(code, steps):
+        pieces = relative == code
+        if not pieces.any():
+            return 0
+        total = 0
+        for dx, dy in steps:
+            total += (pieces & _shift(landable, dx, dy, False)).sum(axis=(1, 2))
+        return total
+
+    forward = -1 if sign == 1 else 1
+    counts += count_steps(KHUN, KING_STEPS)
+    counts += count_steps(MET, DIAGONAL_STEPS)
+    counts += count_steps(MA, KNIGHT_STEPS)
+    counts += count_steps(KHON, [(forward, -1), (forward, 0), (forward, 1)])
+
+    bia = relative == BIA
+    counts += (bia & _shift(empty, forward, 0, False)).sum(axis=(1, 2))
+    for dy in (-1, 1):
+        counts += (bia & _shift(enemy, forward, dy, False)).sum(axis=(1, 2))
+
+    rua = relative == RUA
+    if rua.any():
+        for dx, dy in ROOK_DIRECTIONS:
+            ray = rua
+            for step in range(1, 8):
+                ray = ray & _shift(landable, step * dx, step * dy, False)
+                if not ray.any():
+                    break
+                counts += ray.sum(axis=(1, 2))
+                # Captures end the ray
+                ray = ray & _shift(empty, step * dx, step * dy, False)
+    return counts
+
+
+def batch_features(packed):
+    """
+    Compute evaluation features for packed positions.
+    Args:
+        packed (np.ndarray): (N, 8, 8) int8 array from pack_boards.
+    Returns:
+        dict: 'material', 'positional' and 'mobility' as (N,) arrays from
+        White's perspective (mobility is a move-count difference), and
+        'counts' as an (N, 2, 6) array of piece counts indexed
+        [n, 0 for White / 1 for Black, code - 1].
+    """
+    material = VALUE_TABLE[packed.astype(np.intp) + 6].sum(axis=(1, 2))
+    positional = (np.sign(packed) * POSITIONAL_TABLE).sum(axis=(1, 2))
+    mobility = _side_mobility(packed, 1) - _side_mobility(packed, -1)
+    codes = np.arange(1, 7, dtype=np.int8)
+    counts = np.stack([(packed[..., None] == codes).sum(axis=(1, 2)),
+                       (packed[..., None] == -codes).sum(axis=(1, 2))], axis=1)
+    return {'material': material, 'positional': positional, 'mobility': mobility, 'counts': counts}
+
+
+def evaluate_batch(packed, include_mobility=True, chunk_size=65536):
+    """
+    Evaluate packed positions from White's perspective.
+    Args:
+        packed (np.ndarray): (N, 8, 8) int8 array from pack_boards.
+        include_mobility (bool): Match evaluate_board(include_mobility=...).
+        chunk_size (int): Positions processed at a time, bounding temporary memory.
+    Returns:
+        np.ndarray: (N,) float64 scores matching Board.evaluate_board within TOLERANCE.
+    """
+    scores = np.empty(packed.shape[0])
+    for start in range(0, packed.shape[0], chunk_size):
+        chunk = packed[start:start + chunk_size]
+        total = VALUE_TABLE[chunk.astype(np.intp) + 6].sum(axis=(1, 2))
+        total += (np.sign(chunk) * POSITIONAL_TABLE).sum(axis=(1, 2))
+        if include_mobility:
+            total += MOBILITY_WEIGHT * (_side_mobility(chunk, 1) - _side_mobility(chunk, -1))
+        scores[start:start + chunk_size] = total
+    return scores
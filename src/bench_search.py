@@ -0,0 +1,56 @@
+# bench_search.py
+"""
+Measure the selective search features one at a time.
+
+Searches a fixed set of positions with plain alpha-beta and with each
+Searcher option enabled on its own and all together, then reports nodes,
+time and how often the chosen move agrees with plain alpha-beta. Every
+search starts from a fresh board rebuilt from a snapshot, so earlier runs
+cannot affect later ones:
+
+    python bench_search.py --depth 4 --positions 8
+"""
+
+import argparse
+import time
+
+from board import Board
+from parallel_search import benchmark_positions
+from search import Searcher
+
+CONFIGURATIONS = [
+    ('alpha-beta', {}),
+    ('pvs', {'pvs': True}),
+    ('null move', {'null_move': True}),
+    ('lmr', {'lmr': True}),
+    ('quiescence', {'quiescence': True}),
+    ('all', {'pvs': True, 'null_move': True, 'lmr': True, 'quiescence': True}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark selective search features.")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--positions', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    snapshots = [(board.to_bytes(), color) for board, color in benchmark_positions(args.positions, args.seed)]
+    reference = None
+    print(f"{'search':<12} {'nodes':>9} {'seconds':>8} {'same move':>9}")
+    for name, options in CONFIGURATIONS:
+        nodes = 0
+        moves = []
+        started = time.perf_counter()
+        for snapshot, color in snapshots:
+            searcher = Searcher(Board.from_bytes(snapshot), **options)
+            moves.append(searcher.search(args.depth, color)[1])
+            nodes += searcher.nodes
+        elapsed = time.perf_counter() - started
+        reference = reference or moves
+        agreement = sum(a == b for a, b in zip(moves, reference))
+        print(f"{name:<12} {nodes:>9} {elapsed:>8.2f} {agreement:>5}/{len(moves)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,251 @@
 # board.py
 
-import copy
+import random
 from pieces import Khun, Met, Rua, Ma, Khon, Bia
 
-class Board:
+PIECE_VALUES = {
+    Khun: 1000,
+    Met: 9,
+    Rua: 5,
+    Ma: 3,
+    Khon: 3,
+    Bia: 1
+}
+CENTER_BONUS = 0.1  # For pieces on the central 4x4 squares
+EDGE_PENALTY = 0.1  # For pieces on the outer ring
+MOBILITY_WEIGHT = 0.05  # Per available move
+
+# Compact piece codes used by byte snapshots and array encodings; White is
+# positive, Black negative and 0 an empty square
+PIECE_CODES = {Khun: 1, Met: 2, Rua: 3, Ma: 4, Khon: 5, Bia: 6}
+PIECE_TYPES = {code: piece_type for piece_type, code in PIECE_CODES.items()}
+NO_MOVE = 0xFF
+# Upper-case piece letters (White) used by to_fen and from_fen; Black uses lower case
+PIECE_LETTERS = {Khun: 'K', Met: 'Q', Rua: 'R', Ma: 'N', Khon: 'B', Bia: 'P'}
+
+# Makruk counting rules. Once no unpromoted Bia is left, the side with fewer
+# pieces counts its own moves and the game is drawn when the count reaches the
+# limit. Under board's honour the count runs from 0 to 64; under pieces'
+# honour (the counting side has a bare Khun) it starts at the number of pieces
+# on the board and the limit depends on the stronger side's pieces.
+BOARD_HONOUR_LIMIT = 64
+PIECES_HONOUR_LIMITS = [(Rua, 2, 8), (Rua, 1, 16), (Khon, 2, 22), (Khon, 1, 44), (Ma, 2, 32), (Ma, 1, 64)]
+PIECES_HONOUR_DEFAULT_LIMIT = 64  # Met only
+DRAW_SCORE = 0
+
+# Zobrist keys per piece abbreviation and square (x * 8 + y). The seed is fixed
+# so hashes stay the same across runs and can key on-disk caches.
+_zobrist_random = random.Random(0x4D616B72756B)
+ZOBRIST_KEYS = {abbreviation: [_zobrist_random.getrandbits(64) for _ in range(64)]
+                for abbreviation in 'KQRNBPkqrnbp'}
+# XORed into the position hash so the same placement with a different side to
+# move gets a different key
+_side_random = random.Random(0x5349444B)
+SIDE_KEYS = {'white': 0, 'black': _side_random.getrandbits(64)}
+# XORed into transposition table keys while a count runs, since the count and
+# who is counting decide whether a position is already drawn
+COUNT_KEYS = [_side_random.getrandbits(64) for _ in range(256)]
+COUNTING_COLOR_KEYS = {'white': _side_random.getrandbits(64), 'black': _side_random.getrandbits(64)}
+
+class PieceList:
+    """
+    One colour's pieces with their squares, iterated like a dict of
+    (x, y) -> Piece. A move updates its piece's slot in place and a capture
+    removes one slot, which undo_move puts back at the same index, so the
+    iteration order (and with it move generation and evaluation order) does
+    not change across make/unmake.
+    """
+
+    __slots__ = ('positions', 'pieces')
+
     def __init__(self):
+        self.positions = []
+        self.pieces = []
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def __contains__(self, position):
+        return position in self.positions
+
+    def __getitem__(self, position):
+        return self.pieces[self.positions.index(position)]
+
+    def items(self):
+        return zip(self.positions, self.pieces)
+
+    def values(self):
+        return iter(self.pieces)
+
+    def add(self, position, piece):
+        self.positions.append(position)
+        self.pieces.append(piece)
+
+    def move(self, from_pos, to_pos, piece):
+        """Move the piece on from_pos to to_pos; piece replaces it (the Met after a promotion)."""
+        index = self.positions.index(from_pos)
+        self.positions[index] = to_pos
+        self.pieces[index] = piece
+
+    def remove(self, position):
+        """Remove the piece on position; returns its index for insert."""
+        index = self.positions.index(position)
+        del self.positions[index]
+        del self.pieces[index]
+        return index
+
+    def insert(self, index, position, piece):
+        self.positions.insert(index, position)
+        self.pieces.insert(index, piece)
+
+
+class Board:
+    def __init__(self, setup=True):
         # Initialize an 8x8 board
         self.grid = [[None for _ in range(8)] for _ in range(8)]
-        self.setup_pieces()
+        # Per-colour piece lists of (x, y) and Piece, kept in step with the grid
+        self.pieces = {'white': PieceList(), 'black': PieceList()}
+        self.khun_positions = {'white': None, 'black': None}
+        self.position_hash = 0  # Zobrist hash of the piece placement
+        self.bia_counts = {'white': 0, 'black': 0}  # Unpromoted Bia per colour
+        # (rule, counting colour, limit) while a count runs, see update_counting
+        self.counting = None
+        self.count = 0
+        # Keys (position_hash ^ SIDE_KEYS[side to move]) of the positions in the
+        # game so far and on the current search path, and how often each occurs
+        self.hash_stack = []
+        self.hash_counts = {}
+        if setup:
+            self.setup_pieces()
+            self.record_position('white')
         self.last_move = None  # Tracks the last move made
         self.captured_pieces = {'white': [], 'black': []}  # Tracks captured pieces
+        self.move_stack = []  # Undo information for undo_move
+        self.accumulator = None  # Optional incrementally updated evaluator, see nnue.py
 
     def is_on_board(self, x, y):
         """Check if the given coordinates are on the board."""
         return 0 <= x < 8 and 0 <= y < 8
 
+    def place_piece(self, piece, position):
+        """
+        Put a piece on an empty square and register it in the piece lists.
+        Args:
+            piece (Piece): The piece to place.
+            position (tuple): (x, y) coordinates of the square.
+        """
+        x, y = position
+        self.grid[x][y] = piece
+        self.pieces[piece.color].add((x, y), piece)
+        self.position_hash ^= ZOBRIST_KEYS[piece.abbreviation][x * 8 + y]
+        if isinstance(piece, Khun):
+            self.khun_positions[piece.color] = (x, y)
+        elif isinstance(piece, Bia):
+            self.bia_counts[piece.color] += 1
+        self.update_counting('white')
+
+    def record_position(self, to_move):
+        """
+        Add the current position to the repetition history. move_piece does
+        this after every move; call it once for a starting position.
+        Args:
+            to_move (str): Side to move in the position.
+        """
+        key = self.position_hash ^ SIDE_KEYS[to_move]
+        self.hash_stack.append(key)
+        self.hash_counts[key] = self.hash_counts.get(key, 0) + 1
+
+    def repetitions(self):
+        """
+        Returns:
+            int: How often the current position, with the same side to move,
+            has occurred in the game and search path, this time included.
+        """
+        if not self.hash_stack:
+            return 1
+        return self.hash_counts[self.hash_stack[-1]]
+
+    def counting_key(self):
+        """
+        Returns:
+            int: Key of the counting state to mix into transposition table
+            keys, 0 while no count runs.
+        """
+        if self.counting is None:
+            return 0
+        return COUNT_KEYS[self.count] ^ COUNTING_COLOR_KEYS[self.counting[1]]
+
+    def counting_rule(self, to_move):
+        """
+        Work out which counting rule applies to the current material.
+        Args:
+            to_move (str): Side to move, which counts when both sides have as many pieces.
+        Returns:
+            tuple or None: (rule ('board' or 'pieces'), counting colour, limit),
+            or None while any Bia remains unpromoted.
+        """
+        if self.bia_counts['white'] or self.bia_counts['black']:
+            return None
+        white, black = len(self.pieces['white']), len(self.pieces['black'])
+        if white != black:
+            color = 'white' if white < black else 'black'
+        elif self.counting is not None:
+            color = self.counting[1]
+        else:
+            color = to_move
+        if len(self.pieces[color]) > 1:
+            return 'board', color, BOARD_HONOUR_LIMIT
+        strong = [type(piece) for piece in self.pieces['black' if color == 'white' else 'white'].values()]
+        for piece_type, number, limit in PIECES_HONOUR_LIMITS:
+            if strong.count(piece_type) >= number:
+                return 'pieces', color, limit
+        return 'pieces', color, PIECES_HONOUR_DEFAULT_LIMIT
+
+    def update_counting(self, to_move):
+        """
+        Start, switch or stop the count after the material has changed.
+        Args:
+            to_move (str): Side to move next.
+        Returns:
+            bool: True if a new count was started or the count stopped.
+        """
+        rule = self.counting_rule(to_move)
+        if rule == self.counting:
+            return False
+        self.counting = rule
+        self.count = len(self.pieces['white']) + len(self.pieces['black']) if rule and rule[0] == 'pieces' else 0
+        return True
+
     def setup_pieces(self):
         """Set up the initial positions of all pieces."""
         # Place White Bia (Pawns)
         for y in range(8):
-            self.grid[5][y] = Bia('white')
+            self.place_piece(Bia('white'), (5, y))
         # Place White Rooks, Ma, Khon, Met, and Khun
-        self.grid[7][0] = Rua('white')
-        self.grid[7][1] = Ma('white')
-        self.grid[7][2] = Khon('white')
-        self.grid[7][3] = Met('white')
-        self.grid[7][4] = Khun('white')
-        self.grid[7][5] = Khon('white')
-        self.grid[7][6] = Ma('white')
-        self.grid[7][7] = Rua('white')
+        self.place_piece(Rua('white'), (7, 0))
+        self.place_piece(Ma('white'), (7, 1))
+        self.place_piece(Khon('white'), (7, 2))
+        self.place_piece(Met('white'), (7, 3))
+        self.place_piece(Khun('white'), (7, 4))
+        self.place_piece(Khon('white'), (7, 5))
+        self.place_piece(Ma('white'), (7, 6))
+        self.place_piece(Rua('white'), (7, 7))
 
         # Place Black Bia (Pawns)
         for y in range(8):
-            self.grid[2][y] = Bia('black')
+            self.place_piece(Bia('black'), (2, y))
         # Place Black Rooks, Ma, Khon, Met, and Khun
-        self.grid[0][0] = Rua('black')
-        self.grid[0][1] = Ma('black')
-        self.grid[0][2] = Khon('black')
-        self.grid[0][3] = Met('black')
-        self.grid[0][4] = Khun('black')
-        self.grid[0][5] = Khon('black')
-        self.grid[0][6] = Ma('black')
-        self.grid[0][7] = Rua('black')
+        self.place_piece(Rua('black'), (0, 0))
+        self.place_piece(Ma('black'), (0, 1))
+        self.place_piece(Khon('black'), (0, 2))
+        self.place_piece(Met('black'), (0, 3))
+        self.place_piece(Khun('black'), (0, 4))
+        self.place_piece(Khon('black'), (0, 5))
+        self.place_piece(Ma('black'), (0, 6))
+        self.place_piece(Rua('black'), (0, 7))
 
     def move_piece(self, from_pos, to_pos):
         """
@@ -67,25 +271,98 @@ class Board:
         # Move the piece
         self.grid[x2][y2] = piece
         self.grid[x1][y1] = None
+        self.position_hash ^= ZOBRIST_KEYS[piece.abbreviation][x1 * 8 + y1]
 
         # Handle capture
         captured = None
+        captured_index = None
         if target_piece is not None:
             # Add to captured pieces
             self.captured_pieces[target_piece.color].append(target_piece)
             captured = target_piece
+            captured_index = self.pieces[target_piece.color].remove((x2, y2))
+            self.position_hash ^= ZOBRIST_KEYS[target_piece.abbreviation][x2 * 8 + y2]
+            if isinstance(target_piece, Khun):
+                self.khun_positions[target_piece.color] = None
+            elif isinstance(target_piece, Bia):
+                self.bia_counts[target_piece.color] -= 1
 
         # Handle promotion for Bia
+        promoted = False
         if isinstance(piece, Bia):
             promotion_row = 0 if piece.color == 'white' else 7
             if x2 == promotion_row:
                 self.grid[x2][y2] = Met(piece.color)
+                self.bia_counts[piece.color] -= 1
+                promoted = True
+
+        self.pieces[piece.color].move((x1, y1), (x2, y2), self.grid[x2][y2])
+        self.position_hash ^= ZOBRIST_KEYS[self.grid[x2][y2].abbreviation][x2 * 8 + y2]
+        if isinstance(piece, Khun):
+            self.khun_positions[piece.color] = (x2, y2)
 
         # Update last_move
+        self.move_stack.append((from_pos, to_pos, piece, target_piece, self.last_move, self.counting, self.count,
+                                captured_index))
         self.last_move = (from_pos, to_pos)
+        self.record_position('black' if piece.color == 'white' else 'white')
+
+        # Only captures and promotions change which counting rule applies
+        restarted = False
+        if target_piece is not None or promoted:
+            restarted = self.update_counting('black' if piece.color == 'white' else 'white')
+        if not restarted and self.counting is not None and piece.color == self.counting[1]:
+            self.count += 1
+
+        if self.accumulator is not None:
+            self.accumulator.push(piece, from_pos, to_pos, target_piece, self.grid[x2][y2])
 
         return True, {"message": "Move executed.", "captured": captured}
 
+    def undo_move(self):
+        """
+        Take back the last move made with move_piece.
+        Returns:
+            tuple: The ((x1, y1), (x2, y2)) move that was undone.
+        """
+        from_pos, to_pos, piece, captured, last_move, counting, count, captured_index = self.move_stack.pop()
+        key = self.hash_stack.pop()
+        self.hash_counts[key] -= 1
+        if not self.hash_counts[key]:
+            del self.hash_counts[key]
+        x1, y1 = from_pos
+        x2, y2 = to_pos
+        placed = self.grid[x2][y2]  # Differs from piece after a promotion
+        self.pieces[piece.color].move((x2, y2), (x1, y1), piece)
+        self.position_hash ^= ZOBRIST_KEYS[placed.abbreviation][x2 * 8 + y2]
+        if placed is not piece:
+            self.bia_counts[piece.color] += 1
+
+        self.grid[x1][y1] = piece
+        self.position_hash ^= ZOBRIST_KEYS[piece.abbreviation][x1 * 8 + y1]
+        if isinstance(piece, Khun):
+            self.khun_positions[piece.color] = (x1, y1)
+
+        # Restore a captured piece
+        self.grid[x2][y2] = captured
+        if captured is not None:
+            self.captured_pieces[captured.color].pop()
+            self.pieces[captured.color].insert(captured_index, (x2, y2), captured)
+            self.position_hash ^= ZOBRIST_KEYS[captured.abbreviation][x2 * 8 + y2]
+            if isinstance(captured, Khun):
+                self.khun_positions[captured.color] = (x2, y2)
+            elif isinstance(captured, Bia):
+                self.bia_counts[captured.color] += 1
+
+        self.last_move = last_move
+        self.counting = counting
+        self.count = count
+
+        if self.accumulator is not None:
+            self.accumulator.pop()
+
+        return from_pos, to_pos
+
     def display(self):
         """Display the current state of the board."""
         print("\n  a b c d e f g h")
@@ -117,39 +394,156 @@ class Board:
             state.append(tuple(state_row))
         return tuple(state)
 
-    def evaluate_board(self):
+    def to_bytes(self):
+        """
+        Encode the position as a compact snapshot for passing between processes.
+        Returns:
+            bytes: 64 signed piece codes in grid order, the last move as four
+            coordinates (NO_MOVE when there is none), then the counting state as
+            flags (bit 0 counting, bit 1 pieces' honour, bit 2 Black counts),
+            count and limit.
+        """
+        codes = bytearray(64)
+        for color, sign in (('white', 1), ('black', -1)):
+            for (x, y), piece in self.pieces[color].items():
+                codes[x * 8 + y] = (sign * PIECE_CODES[type(piece)]) & 0xFF
+        if self.last_move is None:
+            codes.extend((NO_MOVE,) * 4)
+        else:
+            (x1, y1), (x2, y2) = self.last_move
+            codes.extend((x1, y1, x2, y2))
+        if self.counting is None:
+            codes.extend((0, 0, 0))
+        else:
+            rule, color, limit = self.counting
+            flags = 1 | (2 if rule == 'pieces' else 0) | (4 if color == 'black' else 0)
+            codes.extend((flags, self.count, limit))
+        return bytes(codes)
+
+    @classmethod
+    def from_bytes(cls, data, history=()):
+        """
+        Rebuild a board from a to_bytes snapshot.
+        Args:
+            data (bytes): Snapshot produced by to_bytes.
+            history (iterable): hash_stack of the board the snapshot was taken
+                from, so returns to earlier positions of its game count as
+                repetitions.
+        Returns:
+            Board: A new board with that position and repetition history, but no move history.
+        """
+        board = cls(setup=False)
+        for square in range(64):
+            code = data[square]
+            if code:
+                if code > 127:
+                    code -= 256
+                color = 'white' if code > 0 else 'black'
+                board.place_piece(PIECE_TYPES[abs(code)](color), divmod(square, 8))
+        if data[64] != NO_MOVE:
+            board.last_move = ((data[64], data[65]), (data[66], data[67]))
+        # Older 68-byte snapshots leave the count as derived from the pieces
+        if len(data) > 68:
+            flags, count, limit = data[68:71]
+            if flags & 1:
+                board.counting = ('pieces' if flags & 2 else 'board', 'black' if flags & 4 else 'white', limit)
+                board.count = count
+            else:
+                board.counting = None
+                board.count = 0
+        for key in history:
+            board.hash_stack.append(key)
+            board.hash_counts[key] = board.hash_counts.get(key, 0) + 1
+        return board
+
+    def to_fen(self, color):
+        """
+        Describe the position as text.
+        Args:
+            color (str): Side to move.
+        Returns:
+            str: Ranks from row 0 (rank 8) to row 7 separated by '/', piece
+            letters as in display() with digits for runs of empty squares,
+            then 'w' or 'b' for the side to move.
+        """
+        rows = []
+        for row in self.grid:
+            text = ''
+            empty = 0
+            for piece in row:
+                if piece is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += piece.abbreviation
+            rows.append(text + (str(empty) if empty else ''))
+        return '/'.join(rows) + (' w' if color == 'white' else ' b')
+
+    @classmethod
+    def from_fen(cls, text):
+        """
+        Parse a position written by to_fen. The counting state is derived
+        from the pieces, with any count starting afresh.
+        Args:
+            text (str): Position text.
+        Returns:
+            tuple: (Board, side to move)
+        Raises:
+            ValueError: If the text is not a valid position.
+        """
+        fields = text.split()
+        if len(fields) != 2 or fields[1] not in ('w', 'b'):
+            raise ValueError(f"Expected '<placement> w|b', got {text!r}.")
+        color = 'white' if fields[1] == 'w' else 'black'
+        rows = fields[0].split('/')
+        if len(rows) != 8:
+            raise ValueError(f"Expected 8 ranks, got {len(rows)}.")
+        piece_types = {letter: piece_type for piece_type, letter in PIECE_LETTERS.items()}
+        board = cls(setup=False)
+        for x, row in enumerate(rows):
+            y = 0
+            for char in row:
+                if char.isdigit():
+                    y += int(char)
+                elif char.upper() in piece_types and y < 8:
+                    board.place_piece(piece_types[char.upper()]('white' if char.isupper() else 'black'), (x, y))
+                    y += 1
+                else:
+                    raise ValueError(f"Invalid rank {row!r}.")
+            if y != 8:
+                raise ValueError(f"Rank {row!r} does not have 8 squares.")
+        board.counting = None
+        board.update_counting(color)
+        board.record_position(color)
+        return board, color
+
+    def evaluate_board(self, include_mobility=True):
         """
         Evaluate the board state from White's perspective.
+        Args:
+            include_mobility (bool): Add the mobility term, which needs move generation.
         Returns:
             float: Evaluation score.
         """
-        piece_values = {
-            Khun: 1000,
-            Met: 9,
-            Rua: 5,
-            Ma: 3,
-            Khon: 3,
-            Bia: 1
-        }
+        if self.accumulator is not None:
+            return self.accumulator.evaluate(self)
         total = 0
-        for x in range(8):
-            for y in range(8):
-                piece = self.grid[x][y]
-                if piece is not None:
-                    value = piece_values.get(type(piece), 0)
+        for color, sign in (('white', 1), ('black', -1)):
+            for (x, y), piece in self.pieces[color].items():
+                value = PIECE_VALUES.get(type(piece), 0)
 
-                    if 2 <= x <= 5 and 2 <= y <= 5:
-                        value += 0.1
+                if 2 <= x <= 5 and 2 <= y <= 5:
+                    value += CENTER_BONUS
 
-                    elif x == 0 or x == 7 or y == 0 or y == 7:
-                        value -= 0.1
+                elif x == 0 or x == 7 or y == 0 or y == 7:
+                    value -= EDGE_PENALTY
 
+                if include_mobility:
                     moves = piece.get_possible_moves(self, (x, y))
-                    value += 0.05 * len(moves)
-                    if piece.color == 'white':
-                        total += value
-                    else:
-                        total -= value
+                    value += MOBILITY_WEIGHT * len(moves)
+                total += sign * value
         return total
 
     def get_all_possible_moves(self, color):
@@ -161,31 +555,12 @@ class Board:
             list: List of moves, each move is ((x1, y1), (x2, y2)).
         """
         moves = []
-        for x in range(8):
-            for y in range(8):
-                piece = self.grid[x][y]
-                if piece is not None and piece.color == color:
-                    positions = piece.get_possible_moves(self, (x, y))
-                    for pos in positions:
-                        moves.append(((x, y), pos))
+        for (x, y), piece in self.pieces[color].items():
+            positions = piece.get_possible_moves(self, (x, y))
+            for pos in positions:
+                moves.append(((x, y), pos))
         return moves
 
-    def get_possible_moves_excluding_reverse(self, color):
-        """
-        Get all possible moves for the given color, excluding moves that reverse the last move.
-        Args:
-            color (str): 'white' or 'black'.
-        Returns:
-            list: Filtered list of moves.
-        """
-        all_moves = self.get_all_possible_moves(color)
-        if not self.last_move:
-            return all_moves
-        reversed_last_move = (self.last_move[1], self.last_move[0])
-
-        filtered_moves = [move for move in all_moves if move != reversed_last_move]
-        return filtered_moves
-
     def minimax(self, depth, maximizing_player):
         """
         Minimax algorithm without alpha-beta pruning.
@@ -196,11 +571,13 @@ class Board:
             tuple: (evaluation score, best move)
         """
         game_over, winner = self.is_game_over()
+        if game_over and winner is None:
+            return DRAW_SCORE, None
         if depth == 0 or game_over:
             return self.evaluate_board(), None
 
         color = 'white' if maximizing_player else 'black'
-        possible_moves = self.get_possible_moves_excluding_reverse(color)
+        possible_moves = self.get_all_possible_moves(color)
 
         if not possible_moves:
             return self.evaluate_board(), None
@@ -210,11 +587,14 @@ class Board:
         if maximizing_player:
             max_eval = float('-inf')
             for move in possible_moves:
-                new_board = copy.deepcopy(self)
-                success, result = new_board.move_piece(move[0], move[1])
+                success, result = self.move_piece(move[0], move[1])
                 if not success:
                     continue  # Skip invalid moves
-                eval, _ = new_board.minimax(depth - 1, False)
+                if self.repetitions() > 1:
+                    eval = DRAW_SCORE  # Repeats an earlier position
+                else:
+                    eval, _ = self.minimax(depth - 1, False)
+                self.undo_move()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = move
@@ -222,11 +602,14 @@ class Board:
         else:
             min_eval = float('inf')
             for move in possible_moves:
-                new_board = copy.deepcopy(self)
-                success, result = new_board.move_piece(move[0], move[1])
+                success, result = self.move_piece(move[0], move[1])
                 if not success:
                     continue  # Skip invalid moves
-                eval, _ = new_board.minimax(depth - 1, True)
+                if self.repetitions() > 1:
+                    eval = DRAW_SCORE  # Repeats an earlier position
+                else:
+                    eval, _ = self.minimax(depth - 1, True)
+                self.undo_move()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = move
@@ -236,21 +619,17 @@ class Board:
         """
         Check if the game has ended.
         Returns:
-            tuple: (True/False, winner ('white' or 'black') or None)
+            tuple: (True/False, winner ('white' or 'black') or None for a draw)
         """
-        white_khun_exists = False
-        black_khun_exists = False
-        for row in self.grid:
-            for piece in row:
-                if isinstance(piece, Khun):
-                    if piece.color == 'white':
-                        white_khun_exists = True
-                    elif piece.color == 'black':
-                        black_khun_exists = True
-        if not white_khun_exists:
+        if self.khun_positions['white'] is None:
             return True, 'black'
-        if not black_khun_exists:
+        if self.khun_positions['black'] is None:
             return True, 'white'
+        # Drawn by the counting rules, or two bare Khuns
+        if self.counting is not None and self.count >= self.counting[2]:
+            return True, None
+        if len(self.pieces['white']) == 1 and len(self.pieces['black']) == 1:
+            return True, None
         return False, None
 
     def get_captured_pieces(self, color):
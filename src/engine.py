@@ -0,0 +1,87 @@
+# engine.py
+
+import hashlib
+import time
+
+from board import Board
+from profiler import MoveProfiler
+from search import Searcher, SEARCH_OPTIONS
+
+# Set from the MAKRUK_PROFILE environment variables, see profiler.py
+DEFAULT_PROFILER = MoveProfiler.from_environ()
+
+
+def search_config(board, options):
+    """
+    Fingerprint of the engine configuration for analysis cache keys: the
+    evaluator (NNUE weights or the handcrafted evaluation) and the Searcher
+    options that change results.
+    Returns:
+        int: 64-bit fingerprint.
+    """
+    evaluator = board.accumulator.network.fingerprint() if board.accumulator is not None else 'handcrafted'
+    flags = ','.join(option for option in SEARCH_OPTIONS if options.get(option))
+    digest = hashlib.blake2b(f"{evaluator};{flags}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+def choose_move(board, depth, color, cache=None, metrics=None, time_limit=None, node_limit=None, profiler=None,
+                ply=None, **options):
+    """
+    AI entry point: search the position for the side to move.
+    Args:
+        board (Board): Position to search. It is not modified.
+        depth (int): Search depth in plies.
+        color (str): 'white' or 'black', the side to move.
+        cache (AnalysisCache): Optional persistent cache consulted before
+            searching and updated afterwards. It is bypassed while a count
+            runs, since the result then depends on the count.
+        metrics (MoveMetrics): Optional per-move metrics to record the move in.
+        time_limit (float): Seconds the search may take; depth then caps it.
+        node_limit (int): Nodes the search may visit.
+        profiler (MoveProfiler): Profiler for the search, DEFAULT_PROFILER if omitted.
+        ply (int): Ply of the move in its game, for the profiler; needed for
+            boards without their move history, such as snapshots.
+        **options: Searcher options (pvs, null_move, lmr, quiescence, table, eval_cache).
+    Returns:
+        tuple: (evaluation score from White's perspective, best move or None)
+    """
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    if board.counting is not None:
+        cache = None
+    if cache is not None:
+        config = search_config(board, options)
+        cached = cache.get(board.position_hash, color, depth, config)
+        if cached is not None:
+            if metrics is not None:
+                metrics.record(time.perf_counter() - started, time.process_time() - cpu_started, 0, depth, True)
+            return cached
+    if profiler is None:
+        profiler = DEFAULT_PROFILER
+    session = profiler.begin(board, color, ply) if profiler is not None else None
+    searcher = Searcher(board, **options)
+    try:
+        score, move = searcher.search(depth, color, time_limit, node_limit)
+    finally:
+        if session is not None:
+            profiler.end(session, time.perf_counter() - started, searcher.nodes, searcher.completed_depth)
+    # Only a search that reached the full depth stands for that depth
+    if cache is not None and searcher.completed_depth == depth:
+        cache.put(board.position_hash, color, depth, score, move, config)
+    if metrics is not None:
+        metrics.record(time.perf_counter() - started, time.process_time() - cpu_started, searcher.nodes,
+                       searcher.completed_depth, None if cache is None else False,
+                       searcher.stats['table_probes'], searcher.stats['table_hits'],
+                       searcher.stats['eval_probes'], searcher.stats['eval_hits'])
+    return score, move
+
+
+def choose_move_from_snapshot(snapshot, depth, color, history=(), **options):
+    """
+    choose_move for a Board.to_bytes snapshot, for use in worker processes.
+    Args:
+        history (iterable): The game's Board.hash_stack, for repetition detection.
+    Returns:
+        tuple: (evaluation score from White's perspective, best move or None)
+    """
+    return choose_move(Board.from_bytes(snapshot, history), depth, color, **options)
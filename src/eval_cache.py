@@ -0,0 +1,68 @@
+# eval_cache.py
+"""
+Fixed-size cache of static evaluations keyed by position hash.
+
+Different search paths reach the same leaves, and Board.evaluate_board
+generates every piece's moves for the mobility term each time. EvalCache
+is direct-mapped: the low bits of the hash pick one slot, which holds the
+last position stored there, so lookups cost one comparison and the cache
+never grows. It is separate from the transposition table and, holding only
+a key and a score per slot, much denser.
+
+Scores are cached per placement, so one cache must not be shared between
+different evaluators (e.g. with and without NNUE).
+"""
+
+from array import array
+
+ENTRY_BYTES = 16  # One 64-bit key and one double
+
+
+class EvalCache:
+    """
+    Direct-mapped evaluation cache.
+    Args:
+        entries (int): Number of slots, rounded up to a power of two.
+    """
+
+    def __init__(self, entries=1 << 16):
+        size = 2
+        while size < entries:
+            size *= 2
+        self.mask = size - 1
+        # A slot only ever holds keys whose low bits equal its index, so
+        # index ^ 1 marks it empty without a separate flag
+        self.keys = array('Q', (index ^ 1 for index in range(size)))
+        self.scores = array('d', bytes(8 * size))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def probe(self, key):
+        """
+        Returns:
+            float or None: The cached score for key, None if its slot holds another position.
+        """
+        index = key & self.mask
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, key, score):
+        index = key & self.mask
+        self.keys[index] = key
+        self.scores[index] = score
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def clear(self):
+        for index in range(len(self.keys)):
+            self.keys[index] = index ^ 1
+        self.hits = self.misses = 0
@@ -0,0 +1,173 @@
+# game_log.py
+"""
+Append-only binary log of finished games.
+
+A log is two files. PATH holds fixed-size 2-byte move records, the from
+and to squares (x * 8 + y) packed as from << 6 | to, one game after
+another. PATH.idx holds one 16-byte entry per game: the record number of
+its first move (uint64), its move count (uint32) and its result (uint8),
+little-endian. Both start with an 8-byte header. A game's moves are
+appended before its index entry, so an interrupted write never leaves an
+index entry pointing at missing moves, and GameLogWriter cuts a partly
+written record or entry off the end of either file before appending.
+
+Every game starts from the standard opening position. GameLog maps both
+files read-only and replays games straight from the records:
+
+    log = GameLog('games.mklog')
+    for game, ply, board in log.positions():
+        ...
+"""
+
+import mmap
+import os
+import struct
+
+from board import Board
+
+MAGIC = b'MKLG'
+VERSION = 1
+HEADER = struct.Struct('<4sHxx')
+INDEX_ENTRY = struct.Struct('<QIB3x')
+MOVE_BYTES = 2
+RESULTS = ('draw', 'white', 'black', 'unfinished')
+
+
+def encode_move(move):
+    (x1, y1), (x2, y2) = move
+    return (x1 * 8 + y1) << 6 | (x2 * 8 + y2)
+
+
+def decode_move(record):
+    return divmod(record >> 6, 8), divmod(record & 0x3F, 8)
+
+
+def _open_for_append(path, unit):
+    """
+    Open a log file for appending, writing the header to a new file and
+    truncating a torn tail left by an interrupted write to whole units.
+    Args:
+        path (str): File to open.
+        unit (int): Size of one record or index entry in bytes.
+    """
+    f = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+    size = os.fstat(f.fileno()).st_size
+    if size < HEADER.size:
+        f.truncate(0)
+        f.write(HEADER.pack(MAGIC, VERSION))
+        return f
+    magic, version = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        f.close()
+        raise ValueError(f"{path} is not a version {VERSION} game log.")
+    whole = HEADER.size + (size - HEADER.size) // unit * unit
+    if whole != size:
+        f.truncate(whole)
+    f.seek(whole)
+    return f
+
+
+class GameLogWriter:
+    """
+    Appends games to a log, creating it if needed. Only one writer may
+    append to a log at a time.
+    Args:
+        path (str): Path of the move file; the index is path + '.idx'.
+    """
+
+    def __init__(self, path):
+        self.moves = _open_for_append(path, MOVE_BYTES)
+        self.index = _open_for_append(path + '.idx', INDEX_ENTRY.size)
+
+    def write_game(self, moves, result):
+        """
+        Append one game.
+        Args:
+            moves (list): Moves as ((x1, y1), (x2, y2)) from the opening position.
+            result (str): 'white', 'black', 'draw' or 'unfinished'.
+        """
+        first = (self.moves.tell() - HEADER.size) // MOVE_BYTES
+        self.moves.write(struct.pack(f'<{len(moves)}H', *map(encode_move, moves)))
+        self.moves.flush()
+        self.index.write(INDEX_ENTRY.pack(first, len(moves), RESULTS.index(result)))
+        self.index.flush()
+
+    def close(self):
+        self.moves.close()
+        self.index.close()
+
+
+def _map(path):
+    """Map a log file read-only, checking its header; None while it holds no records."""
+    with open(path, 'rb') as f:
+        magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game log.")
+        if os.fstat(f.fileno()).st_size == HEADER.size:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class GameLog:
+    """
+    Read-only, memory-mapped view of a game log. Games appended after the
+    log was opened are not visible until it is reopened.
+    Args:
+        path (str): Path of the move file.
+    """
+
+    def __init__(self, path):
+        self.move_map = _map(path)
+        self.index_map = _map(path + '.idx')
+        # Whole records only, in case a write was cut short
+        self.record_count = (len(self.move_map) - HEADER.size) // MOVE_BYTES if self.move_map else 0
+        index_bytes = len(self.index_map) - HEADER.size if self.index_map else 0
+        self.games = index_bytes // INDEX_ENTRY.size
+
+    def __len__(self):
+        return self.games
+
+    def entry(self, game):
+        """
+        Returns:
+            tuple: (first move record, move count, result) for a game.
+        """
+        if not 0 <= game < self.games:
+            raise IndexError(game)
+        first, count, result = INDEX_ENTRY.unpack_from(self.index_map, HEADER.size + game * INDEX_ENTRY.size)
+        return first, count, RESULTS[result]
+
+    def moves(self, game):
+        """The game's moves as ((x1, y1), (x2, y2))."""
+        first, count, _ = self.entry(game)
+        count = max(0, min(count, self.record_count - first))
+        # Records are little-endian whatever the host byte order
+        records = struct.unpack_from(f'<{count}H', self.move_map, HEADER.size + first * MOVE_BYTES) if count else ()
+        return [decode_move(record) for record in records]
+
+    def result(self, game):
+        return self.entry(game)[2]
+
+    def replay(self, game):
+        """
+        Yield the positions of a game. The same Board is updated in place,
+        so copy it (e.g. with to_bytes) to keep a position.
+        Yields:
+            tuple: (ply, board) for the opening position (ply 0) and after each move.
+        """
+        board = Board()
+        yield 0, board
+        for ply, move in enumerate(self.moves(game), 1):
+            board.move_piece(*move)
+            yield ply, board
+
+    def positions(self):
+        """Yield (game, ply, board) for every position of every game."""
+        for game in range(self.games):
+            for ply, board in self.replay(game):
+                yield game, ply, board
+
+    def close(self):
+        for mapped in (self.move_map, self.index_map):
+            if mapped is not None:
+                mapped.close()
@@ -1,39 +1,39 @@
 import pyglet
 from pyglet.window import mouse
 import Pieces as p
+import assets
+import chess_position as cp
+from search import SearchHandle
+from variants import ChessPosition
 
 
 class Chess(pyglet.window.Window):
-    chessboard = pyglet.resource.image('resources/chessboard.png')
-    validImg = pyglet.resource.image('resources/validmove.png')
-    # hoverImg = pyglet.resource.image('resources/hoversquare.png')
-    # wpromoImg = pyglet.resource.image('resources/pawn_promotion_colored.png')
-    # bpromoImg = pyglet.resource.image('resources/bpawn_promotion_colored.png')
-    promoImg = pyglet.resource.image('resources/promotion.png')
     currentPos = (-1, -1)
     move = True
     promotion = False
-    spriteimage = pyglet.resource.image('resources/spritesheet.png')
-    spritesheet = pyglet.image.ImageGrid(spriteimage, 2, 6)
 
-    def __init__(self):
+    def __init__(self, aiWhite=None, aiTime=1.0):
+        # aiWhite: True or False to let the engine play White or Black, None for two players
         super(Chess, self).__init__(600, 600,
                                     resizable=False,
                                     caption='Chess',
                                     config=pyglet.gl.Config(double_buffer=True),
                                     vsync=False)
-        self.wKing = p.King(4, 0)
-        self.bKing = p.King(4, 7, False)
-        self.board = [[p.Rook(0, 0), p.Knight(1, 0), p.Bishop(2, 0), p.Queen(3, 0), self.wKing, p.Bishop(5, 0),
-                       p.Knight(6, 0), p.Rook(7,0)],
-                      [p.Pawn(i, 1) for i in range(8)],
-                      [None for i in range(8)],
-                      [None for i in range(8)],
-                      [None for i in range(8)],
-                      [None for i in range(8)],
-                      [p.Pawn(i, 6, False) for i in range(8)],
-                      [p.Rook(0, 7, False), p.Knight(1, 7, False), p.Bishop(2, 7, False), p.Queen(3, 7, False),
-                       self.bKing, p.Bishop(5, 7, False), p.Knight(6, 7, False), p.Rook(7, 7, False)]]
+        # Textures need the GL context created above, so resources are loaded here
+        # on first window creation rather than when the module is imported
+        self.chessboard = assets.image('resources/chessboard.png')
+        self.validImg = assets.image('resources/validmove.png')
+        # hoverImg = assets.image('resources/hoversquare.png')
+        # wpromoImg = assets.image('resources/pawn_promotion_colored.png')
+        # bpromoImg = assets.image('resources/bpawn_promotion_colored.png')
+        self.promoImg = assets.image('resources/promotion.png')
+        self.spritesheet = assets.spritesheet()
+        self.position = cp.Position()
+        self.history = [self.position.hash]  # Hashes of the positions so far, for the AI's repetition checks
+        self.board = [[None for i in range(8)] for j in range(8)]
+        self.SyncSprites()
+        self.RefreshMoveCache()
+        self.promoMove = None
         self.validsprites = []
         for i in range(8):
             rowsprites = []
@@ -50,7 +50,10 @@ class Chess(pyglet.window.Window):
         self.bRook = pyglet.sprite.Sprite(self.spritesheet[4], 218.75, 225)
         self.bBishop = pyglet.sprite.Sprite(self.spritesheet[2], 306.25, 225)
         self.bKnight = pyglet.sprite.Sprite(self.spritesheet[3], 393.75, 225)
-
+        self.aiWhite = aiWhite
+        self.aiTime = aiTime
+        self.aiSearch = None
+        self.StartAI()
 
     def on_draw(self):
         self.clear()
@@ -72,103 +75,138 @@ class Chess(pyglet.window.Window):
                 self.wBishop.draw()
                 self.wKnight.draw()
 
+    def SyncSprites(self):
+        # Bring the sprite grid in line with self.position. Sprites whose square no
+        # longer matches the model are reused where the same piece appears elsewhere
+        # (so a moving king keeps its danger sprite) and created otherwise.
+        spare = {}
+        changed = []
+        for sq in range(64):
+            row, col = divmod(sq, 8)
+            sprite = self.board[row][col]
+            code = self.position.piece_at(sq)
+            if sprite is not None and sprite.code == code:
+                continue
+            if sprite is not None:
+                spare.setdefault(sprite.code, []).append(sprite)
+                self.board[row][col] = None
+            if code != cp.EMPTY:
+                changed.append(sq)
+        for sq in changed:
+            row, col = divmod(sq, 8)
+            code = self.position.piece_at(sq)
+            if spare.get(code):
+                sprite = spare[code].pop()
+                sprite.ChangeLocation(col, row)
+            else:
+                sprite = p.CreatePiece(code, col, row)
+            self.board[row][col] = sprite
+        wRow, wCol = divmod(self.position.king_squares[True], 8)
+        bRow, bCol = divmod(self.position.king_squares[False], 8)
+        self.wKing = self.board[wRow][wCol]
+        self.bKing = self.board[bRow][bCol]
+
+    def HideValidMoves(self):
+        for row in self.validsprites:
+            for sprite in row:
+                sprite.visible = False
+
+    def RefreshMoveCache(self):
+        # Everything the click handlers need about the position, computed once
+        # per move: the side to move's legal moves by square, which kings are in
+        # check, and whether the game has ended
+        self.legalMoves = self.position.legal_moves()
+        self.checks = {True: self.position.in_check(True), False: self.position.in_check(False)}
+        if self.legalMoves:
+            self.gameState = None
+        elif self.checks[self.position.white_to_move]:
+            self.gameState = 'checkmate'
+        else:
+            self.gameState = 'stalemate'
+
+    def PlayMove(self, from_sq, to_sq, promotion=cp.QUEEN):
+        self.position.make_move(from_sq, to_sq, promotion)
+        self.history.append(self.position.hash)
+        self.SyncSprites()
+        self.move = self.position.white_to_move
+        self.RefreshMoveCache()
+        self.UpdateCheckStatus()
+        self.StartAI()
+
+    def StartAI(self):
+        # Search a copy of the position in the background so the window keeps
+        # drawing; update() plays the move once the time is up
+        if self.aiWhite is None or self.gameState is not None or self.position.white_to_move != self.aiWhite:
+            return
+        color = 'white' if self.aiWhite else 'black'
+        self.aiSearch = SearchHandle(ChessPosition(self.position.copy(), self.history[:-1]), color,
+                                     time_limit=self.aiTime, quiescence=True).start()
+
+    def UpdateCheckStatus(self):
+        self.wKing.danger.visible = self.checks[True]
+        self.bKing.danger.visible = self.checks[False]
+        if self.gameState is not None:
+            if self.gameState == 'stalemate':
+                print('Stalemate!')
+            elif self.move:
+                print("Checkmate! Black wins.")
+            else:
+                print("Checkmate! White wins.")
+
     def on_mouse_press(self, x, y, button, modifiers):
+        if self.aiSearch is not None:
+            return
         if self.promotion:
-            if button == mouse.LEFT:
-                if 225 < y < 300:
-                    if 131.25 < x < 206.25:
-                        self.board[self.promoPawn[0]][self.promoPawn[1]] = p.Queen(self.promoPawn[1], self.promoPawn[0], not self.move)
-                    elif 218.75 < x < 293.75:
-                        self.board[self.promoPawn[0]][self.promoPawn[1]] = p.Rook(self.promoPawn[1], self.promoPawn[0], not self.move)
-                    elif 306.25 < x < 381.25:
-                        self.board[self.promoPawn[0]][self.promoPawn[1]] = p.Bishop(self.promoPawn[1], self.promoPawn[0], not self.move)
-                    elif 393.75 < x < 468.75:
-                        self.board[self.promoPawn[0]][self.promoPawn[1]] = p.Knight(self.promoPawn[1], self.promoPawn[0], not self.move)
-                self.promoPawn = (-1, -1)
-                self.promotion = False
-                if not self.move:
-                    if self.bKing.NoValidMoves(self.board) and not self.bKing.InCheck(self.board):
-                        print('Stalemate!')
-                    if self.bKing.InCheck(self.board):
-                        self.bKing.danger.visible = True
-                        if self.bKing.NoValidMoves(self.board):
-                            print("Checkmate! White wins.")
-                    if self.wKing.danger.visible:
-                        if not self.wKing.InCheck(self.board):
-                            self.wKing.danger.visible = False
+            if button == mouse.LEFT and 225 < y < 300:
+                if 131.25 < x < 206.25:
+                    kind = cp.QUEEN
+                elif 218.75 < x < 293.75:
+                    kind = cp.ROOK
+                elif 306.25 < x < 381.25:
+                    kind = cp.BISHOP
+                elif 393.75 < x < 468.75:
+                    kind = cp.KNIGHT
                 else:
-                    if self.wKing.NoValidMoves(self.board) and not self.wKing.InCheck(self.board):
-                        print('Stalemate!')
-                    if self.wKing.InCheck(self.board):
-                        self.wKing.danger.visible = True
-                        if self.wKing.NoValidMoves(self.board):
-                            print("Checkmate! Black wins.")
-                    if self.bKing.danger.visible:
-                        if not self.bKing.InCheck(self.board):
-                            self.bKing.danger.visible = False
+                    return
+                self.promotion = False
+                from_sq, to_sq = self.promoMove
+                self.promoMove = None
+                self.PlayMove(from_sq, to_sq, kind)
         else:
             if button == mouse.LEFT:
                 boardX = x//75
                 boardY = y//75
-                if self.currentPos[0] < 0 and self.currentPos[1] < 0:
-                    if self.board[boardY][boardX] is not None and self.move == self.board[boardY][boardX].white:
-                        self.currentPos = (boardY, boardX)
-                        if self.move:
-                            ValidMoves = self.board[boardY][boardX].GetValidMoves(self.board, self.wKing)
-                        else:
-                            ValidMoves = self.board[boardY][boardX].GetValidMoves(self.board, self.bKing)
-                        if len(ValidMoves) == 0:
-                            self.currentPos = (-1, -1)
-                        else:
-                            for move in ValidMoves:
-                                self.validsprites[move[0]][move[1]].visible = True
-                elif self.board[boardY][boardX] is not None and self.move == self.board[boardY][boardX].white:
-                    for row in self.validsprites:
-                        for sprite in row:
-                            sprite.visible = False
+                if self.board[boardY][boardX] is not None and self.move == self.board[boardY][boardX].white:
+                    self.HideValidMoves()
                     self.currentPos = (boardY, boardX)
-                    if self.move:
-                        ValidMoves = self.board[boardY][boardX].GetValidMoves(self.board, self.wKing)
-                    else:
-                        ValidMoves = self.board[boardY][boardX].GetValidMoves(self.board, self.bKing)
+                    ValidMoves = self.legalMoves.get(cp.square(boardY, boardX), [])
                     if len(ValidMoves) == 0:
                         self.currentPos = (-1, -1)
                     else:
                         for move in ValidMoves:
-                            self.validsprites[move[0]][move[1]].visible = True
-                else:
-                    if self.validsprites[boardY][boardX].visible:
-                        self.board[boardY][boardX] = self.board[self.currentPos[0]][self.currentPos[1]]
-                        self.board[self.currentPos[0]][self.currentPos[1]].ChangeLocation(boardX, boardY, self.board)
-                        if type(self.board[self.currentPos[0]][self.currentPos[1]]) is p.Pawn and (boardY == 0 or boardY == 7):
-                            self.promotion = True
-                            self.promoPawn = (boardY, boardX)
+                            row, col = divmod(move, 8)
+                            self.validsprites[row][col].visible = True
+                elif self.currentPos[0] >= 0 and self.validsprites[boardY][boardX].visible:
+                    from_sq = cp.square(self.currentPos[0], self.currentPos[1])
+                    to_sq = cp.square(boardY, boardX)
+                    self.HideValidMoves()
+                    if abs(self.position.piece_at(from_sq)) == cp.PAWN and (boardY == 0 or boardY == 7):
+                        # Show the pawn on its new square until the promotion piece is chosen
+                        pawn = self.board[self.currentPos[0]][self.currentPos[1]]
                         self.board[self.currentPos[0]][self.currentPos[1]] = None
-                        self.currentPos = (-1, -1)
-                        if self.move:
-                            if self.bKing.NoValidMoves(self.board) and not self.bKing.InCheck(self.board):
-                                print('Stalemate!')
-                            if self.bKing.InCheck(self.board):
-                                self.bKing.danger.visible = True
-                                if self.bKing.NoValidMoves(self.board):
-                                    print("Checkmate! White wins.")
-                            if self.wKing.danger.visible:
-                                if not self.wKing.InCheck(self.board):
-                                    self.wKing.danger.visible = False
-                        else:
-                            if self.wKing.NoValidMoves(self.board) and not self.wKing.InCheck(self.board):
-                                print('Stalemate!')
-                            if self.wKing.InCheck(self.board):
-                                self.wKing.danger.visible = True
-                                if self.wKing.NoValidMoves(self.board):
-                                    print("Checkmate! Black wins.")
-                            if self.bKing.danger.visible:
-                                if not self.bKing.InCheck(self.board):
-                                    self.bKing.danger.visible = False
+                        self.board[boardY][boardX] = pawn
+                        pawn.ChangeLocation(boardX, boardY)
+                        self.promotion = True
+                        self.promoMove = (from_sq, to_sq)
                         self.move = not self.move
-                        for row in self.validsprites:
-                            for sprite in row:
-                                sprite.visible = False
+                    else:
+                        self.PlayMove(from_sq, to_sq)
+                    self.currentPos = (-1, -1)
 
     def update(self, dt):
-        self.on_draw()
\ No newline at end of file
+        if self.aiSearch is not None and self.aiSearch.done():
+            move = self.aiSearch.wait()[1]
+            self.aiSearch = None
+            if move is not None:
+                self.PlayMove(*move)
+        self.on_draw()
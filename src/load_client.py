@@ -0,0 +1,135 @@
+# load_client.py
+"""
+Load generator for session_server.
+
+Opens a number of connections, starts many sessions spread across them and
+has the server play AI-vs-AI moves in every session concurrently, then prints
+client-side round-trip latency and the server's own statistics. With
+--abandon some sessions are never closed; once the clients disconnect, a
+fresh connection checks that the server closed them.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+from session_server import LatencyStats
+
+
+class Client:
+    """One connection to the server with pipelined, id-tagged requests."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count(1)
+        self.waiting = {}
+        self.listener = asyncio.get_running_loop().create_task(self.listen())
+
+    @classmethod
+    async def connect(cls, args):
+        if args.unix:
+            reader, writer = await asyncio.open_unix_connection(args.unix)
+        else:
+            reader, writer = await asyncio.open_connection(args.host, args.port)
+        return cls(reader, writer)
+
+    async def listen(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.waiting.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Server closed the connection."))
+
+    async def request(self, op, **fields):
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write(json.dumps(dict(fields, id=request_id, op=op)).encode() + b'\n')
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self.listener.cancel()
+
+
+async def play_session(client, args, latency, counters, abandon=False):
+    response = await client.request('new')
+    if 'error' in response:
+        counters['errors'] += 1
+        return
+    session = response['session']
+    for _ in range(args.moves):
+        started = time.perf_counter()
+        response = await client.request('ai', session=session, depth=args.depth)
+        latency.record(time.perf_counter() - started)
+        if 'error' in response:
+            counters['errors'] += 1
+            break
+        counters['moves'] += 1
+        if response.get('game_over') or response.get('move') is None:
+            counters['finished'] += 1
+            break
+    if not abandon:
+        await client.request('close', session=session)
+
+
+async def run(args):
+    clients = [await Client.connect(args) for _ in range(args.connections)]
+    latency = LatencyStats(window=1000000)
+    counters = {'moves': 0, 'errors': 0, 'finished': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(play_session(clients[i % len(clients)], args, latency, counters,
+                                        abandon=i >= args.sessions - args.abandon)
+                           for i in range(args.sessions)))
+    elapsed = time.perf_counter() - started
+    server_stats = await clients[0].request('stats')
+    open_before = server_stats['sessions']
+    for client in clients:
+        await client.close()
+    if args.abandon:
+        # The server closes a connection's sessions once it notices the disconnect
+        checker = await Client.connect(args)
+        for _ in range(50):
+            open_after = (await checker.request('stats'))['sessions']
+            if open_after <= open_before - args.abandon:
+                break
+            await asyncio.sleep(0.1)
+        await checker.close()
+
+    print(f"Sessions: {args.sessions} over {args.connections} connections, depth {args.depth}")
+    print(f"AI moves: {counters['moves']} in {elapsed:.2f}s "
+          f"({counters['moves'] / elapsed:.1f} moves/s), "
+          f"{counters['finished']} games finished, {counters['errors']} errors")
+    print(f"Client round trip: {json.dumps(latency.summary())}")
+    if args.abandon:
+        print(f"Abandoned sessions: {args.abandon}, sessions open before disconnect {open_before}, after {open_after}")
+    server_stats.pop('id', None)
+    print(f"Server: {json.dumps(server_stats)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against session_server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Connect to a Unix socket path instead of TCP.")
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--moves', type=int, default=10, help="AI moves to request per session.")
+    parser.add_argument('--depth', type=int, default=1)
+    parser.add_argument('--abandon', type=int, default=0,
+                        help="Sessions to leave open when disconnecting, to check the server closes them.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
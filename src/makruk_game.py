@@ -1,7 +1,10 @@
 # makruk_game.py
 
 from board import Board
+from engine import choose_move
+from analysis_cache import AnalysisCache
 from pieces import *
+import argparse
 import sys
 
 DIFFICULTY_LEVELS = {
@@ -28,6 +31,17 @@ def parse_square(square):
         return None
     return x, y
 
+def format_square(position):
+    """
+    Convert board coordinates to algebraic notation.
+    Args:
+        position (tuple): (x, y) coordinates.
+    Returns:
+        str: Square in algebraic notation (e.g., 'e3').
+    """
+    x, y = position
+    return f"{chr(y + 97)}{8 - x}"
+
 def get_ai_difficulty(player_color):
     """
     Prompt the user to select AI difficulty.
@@ -43,8 +57,276 @@ def get_ai_difficulty(player_color):
         else:
             print("Invalid selection. Please enter 1, 2, or 3.")
 
-def main():
+class Adjudicator:
+    """
+    Ends engine-vs-engine games once the result is no longer in doubt.
+
+    Scores are the engines' evaluations from White's perspective, reported
+    after each move. A game is resigned when the last scores of both engines
+    favour the same side by at least resign_score for resign_moves moves in
+    a row, and drawn when both stay within draw_score of 0 for draw_moves
+    moves in a row once draw_after moves have been played. Leaving
+    resign_score or draw_score as None disables that rule.
+    Args:
+        resign_score (float): Score margin for resignation.
+        resign_moves (int): Consecutive moves the margin must hold.
+        draw_score (float): Largest absolute score counted as level.
+        draw_moves (int): Consecutive level moves needed for a draw.
+        draw_after (int): Moves played before draws may be agreed.
+    """
+
+    def __init__(self, resign_score=None, resign_moves=4, draw_score=None, draw_moves=8, draw_after=40):
+        self.resign_score = resign_score
+        self.resign_moves = resign_moves
+        self.draw_score = draw_score
+        self.draw_moves = draw_moves
+        self.draw_after = draw_after
+        self.scores = {}
+        self.resign_streak = 0
+        self.draw_streak = 0
+
+    def update(self, color, score, move_number):
+        """
+        Record the score behind a move and check the adjudication rules.
+        Args:
+            color (str): Side whose engine produced the score.
+            score (float): Its evaluation from White's perspective.
+            move_number (int): Moves played so far in the game.
+        Returns:
+            dict or None: The adjudication (winner, rule, score, move) if the game should end.
+        """
+        self.scores[color] = score
+        if len(self.scores) < 2:
+            return None
+        white, black = self.scores['white'], self.scores['black']
+
+        if self.resign_score is not None:
+            if min(white, black) >= self.resign_score or max(white, black) <= -self.resign_score:
+                self.resign_streak += 1
+            else:
+                self.resign_streak = 0
+            if self.resign_streak >= self.resign_moves:
+                return {'winner': 'white' if white > 0 else 'black', 'rule': 'resign',
+                        'score': score, 'move': move_number}
+
+        if self.draw_score is not None and move_number >= self.draw_after:
+            if max(abs(white), abs(black)) <= self.draw_score:
+                self.draw_streak += 1
+            else:
+                self.draw_streak = 0
+            if self.draw_streak >= self.draw_moves:
+                return {'winner': None, 'rule': 'draw', 'score': score, 'move': move_number}
+        return None
+
+def play_ai_game(players, board=None, cache=None, adjudicator=None, opening=(), move_limit=1000,
+                 max_repetitions=3, verbose=False, metrics=None, exporter=None):
+    """
+    Play a game between two engine configurations.
+    Args:
+        players (dict): 'white' and 'black' mapped to (depth, search options dict).
+        board (Board): Starting position, a new board if omitted.
+        cache (AnalysisCache): Optional analysis cache shared by both engines.
+        adjudicator (Adjudicator): Optional rules for ending decided games early.
+        opening (iterable): Moves in 'e3e4' notation played before the engines take over.
+        move_limit (int): Moves after which the game is drawn.
+        max_repetitions (int): Occurrences of a position that draw the game.
+        verbose (bool): Print the moves and the board as the game is played.
+        metrics (MoveMetrics): Optional metrics recording every AI move.
+        exporter (MetricsExporter): Optional exporter given a chance to write after each AI move.
+    Returns:
+        dict: winner ('white', 'black' or None), reason, moves in 'e3e4'
+        notation and the adjudication (None unless the game was adjudicated).
+    """
+    board = board or Board()
+    current_player = 'white'
+    moves = []
+    result = {'winner': None, 'reason': 'move limit', 'moves': moves, 'adjudication': None}
+
+    for move in opening:
+        from_pos, to_pos = parse_square(move[:2]), parse_square(move[2:])
+        if len(move) != 4 or from_pos is None or to_pos is None:
+            raise ValueError(f"Invalid opening move {move!r}.")
+        success, move_result = board.move_piece(from_pos, to_pos)
+        if not success:
+            raise ValueError(f"Invalid opening move {move!r}: {move_result}")
+        moves.append(move)
+        current_player = 'black' if current_player == 'white' else 'white'
+
+    while len(moves) < move_limit:
+        depth, options = players[current_player]
+        score, ai_move = choose_move(board, depth, current_player, cache, metrics, **options)
+        if exporter is not None:
+            exporter.maybe_write()
+        if ai_move is None:
+            result['reason'] = 'no moves'
+            break
+        from_pos, to_pos = ai_move
+        success, move_result = board.move_piece(from_pos, to_pos)
+        if not success:
+            raise ValueError(f"AI attempted an invalid move: {move_result}")
+        moves.append(format_square(from_pos) + format_square(to_pos))
+        if verbose:
+            move_message = f"{current_player.capitalize()} AI moved from {format_square(from_pos)} to {format_square(to_pos)}"
+            if move_result['captured']:
+                captured_piece = move_result['captured']
+                move_message += f", capturing {captured_piece.color.capitalize()} {captured_piece.name}"
+            print(move_message)
+            board.display()
+
+        game_over, winner = board.is_game_over()
+        if game_over:
+            result['winner'] = winner
+            result['reason'] = 'khun captured' if winner else 'counting rules'
+            break
+        if board.repetitions() >= max_repetitions:
+            result['reason'] = 'repetition'
+            break
+        if adjudicator is not None:
+            adjudication = adjudicator.update(current_player, score, len(moves))
+            if adjudication is not None:
+                result['winner'] = adjudication['winner']
+                result['reason'] = 'adjudicated ' + adjudication['rule']
+                result['adjudication'] = adjudication
+                break
+        current_player = 'black' if current_player == 'white' else 'white'
+
+    if verbose:
+        if result['winner']:
+            print(f"{result['winner'].capitalize()} wins the game ({result['reason']}).")
+        else:
+            print(f"The game is a draw ({result['reason']}).")
+    return result
+
+def show_summary(board, cache, exporter=None, eval_cache=None):
+    """Print the captured pieces, cache and move latency statistics at the end of a game."""
+    print("\nFinal Captured Pieces:")
+    print(f"White has captured: {[piece.name for piece in board.get_captured_pieces('white')]}")
+    print(f"Black has captured: {[piece.name for piece in board.get_captured_pieces('black')]}")
+    if cache is not None:
+        print(f"Analysis cache: {cache.hits} hits, {cache.misses} misses")
+        cache.close()
+    if eval_cache is not None and eval_cache.hit_rate is not None:
+        print(f"Evaluation cache: {eval_cache.hits} hits, {eval_cache.misses} misses "
+              f"({eval_cache.hit_rate:.1%} hit rate, {len(eval_cache)} slots)")
+    if exporter is not None:
+        exporter.write()
+        wall = exporter.metrics.histograms['wall_seconds']
+        if wall.count:
+            print(f"AI move time: p50 {wall.quantile(0.5):.3f}s, p99 {wall.quantile(0.99):.3f}s "
+                  f"over {wall.count} moves")
+
+def log_game(path, board, result):
+    """
+    Append the game played on board to a binary game log.
+    Args:
+        path (str): Log path, see game_log.py.
+        board (Board): Board the whole game was played on from the opening.
+        result (str): 'white', 'black', 'draw' or 'unfinished'.
+    """
+    from game_log import GameLogWriter
+    writer = GameLogWriter(path)
+    try:
+        writer.write_game([(from_pos, to_pos) for from_pos, to_pos, *_ in board.move_stack], result)
+    finally:
+        writer.close()
+
+def parse_args(argv=None):
+    """
+    Parse command line options for the game.
+    Args:
+        argv (list): Arguments to parse, or None for sys.argv.
+    Returns:
+        argparse.Namespace: Parsed options.
+    """
+    parser = argparse.ArgumentParser(description="Play Makruk in the terminal.")
+    parser.add_argument('--cache', metavar='PATH',
+                        help="SQLite file caching AI analysis across games and restarts.")
+    parser.add_argument('--cache-size', type=int, default=1000000,
+                        help="Maximum number of cached positions.")
+    parser.add_argument('--nnue', metavar='PATH',
+                        help="Evaluate with NNUE weights from nnue_train.py (needs NumPy).")
+    parser.add_argument('--selective', action='store_true',
+                        help="Use PVS, null-move pruning and late-move reductions in the AI search.")
+    parser.add_argument('--quiescence', action='store_true',
+                        help="Play out captures and promotions at the AI search leaves.")
+    parser.add_argument('--move-time', type=float, metavar='SECONDS',
+                        help="Stop each AI search after this long and play the deepest completed result.")
+    parser.add_argument('--max-nodes', type=int,
+                        help="Stop each AI search after this many nodes.")
+    parser.add_argument('--eval-cache', type=int, metavar='ENTRIES',
+                        help="Cache static evaluations in this many slots (rounded up to a power of two).")
+    parser.add_argument('--memory-budget', metavar='SIZE',
+                        help="Bound the engine's memory (e.g. 64M); sizes the transposition table to fit.")
+    parser.add_argument('--log', metavar='PATH',
+                        help="Append the finished game to a binary game log (see game_log.py).")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="Export AI move metrics to PATH: Prometheus text if it ends in .prom, else JSON.")
+    parser.add_argument('--metrics-interval', type=float, default=10.0,
+                        help="Minimum seconds between metrics exports.")
+    profiling = parser.add_argument_group("AI move profiling (see profiler.py)")
+    profiling.add_argument('--profile', metavar='DIR',
+                           help="Write profiles of AI moves to DIR; defaults to $MAKRUK_PROFILE.")
+    profiling.add_argument('--profile-moves', metavar='PLIES',
+                           help="Comma-separated plies to profile, e.g. 12,30.")
+    profiling.add_argument('--profile-threshold', type=float, metavar='SECONDS',
+                           help="Keep the profile of any AI move that takes at least this long.")
+    profiling.add_argument('--profile-format', choices=('collapsed', 'pstats'), default='collapsed',
+                           help="Sampled collapsed stacks or cProfile pstats.")
+    adjudication = parser.add_argument_group("AI vs AI adjudication")
+    adjudication.add_argument('--resign-score', type=float,
+                              help="Resign when both engines agree a side is behind by this much.")
+    adjudication.add_argument('--resign-moves', type=int, default=4,
+                              help="Consecutive moves the resign margin must hold.")
+    adjudication.add_argument('--draw-score', type=float,
+                              help="Agree a draw when both engines stay within this of 0.")
+    adjudication.add_argument('--draw-moves', type=int, default=8,
+                              help="Consecutive level moves needed for a draw.")
+    adjudication.add_argument('--draw-after', type=int, default=40,
+                              help="Moves played before a draw may be agreed.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    cache = AnalysisCache(args.cache, args.cache_size) if args.cache else None
+    search_options = {'pvs': True, 'null_move': True, 'lmr': True} if args.selective else {}
+    if args.quiescence:
+        search_options['quiescence'] = True
+    if args.move_time is not None:
+        search_options['time_limit'] = args.move_time
+    if args.max_nodes is not None:
+        search_options['node_limit'] = args.max_nodes
+    if args.memory_budget:
+        from memory_budget import MemoryBudget, MemoryBudgetError, parse_size
+        from search import MAX_DEPTH
+        hidden = None
+        if args.nnue:
+            from nnue import Network
+            hidden = Network.load(args.nnue).hidden_size
+        max_depth = MAX_DEPTH if args.move_time or args.max_nodes else max(DIFFICULTY_LEVELS.values())
+        try:
+            budget = MemoryBudget(parse_size(args.memory_budget), max_depth, hidden, args.eval_cache or 0)
+        except (MemoryBudgetError, ValueError) as e:
+            sys.exit(str(e))
+        # One table for the whole game, capped to the budget
+        search_options['table'] = budget.transposition_table()
+        if args.eval_cache:
+            search_options['eval_cache'] = budget.eval_cache()
+    elif args.eval_cache:
+        from eval_cache import EvalCache
+        search_options['eval_cache'] = EvalCache(args.eval_cache)
+    metrics = exporter = None
+    if args.metrics:
+        from metrics import MoveMetrics, MetricsExporter
+        metrics = MoveMetrics()
+        exporter = MetricsExporter(metrics, args.metrics, args.metrics_interval)
+    if args.profile:
+        from profiler import MoveProfiler, parse_moves
+        search_options['profiler'] = MoveProfiler(args.profile, parse_moves(args.profile_moves or ''),
+                                                  args.profile_threshold, args.profile_format)
     board = Board()
+    if args.nnue:
+        from nnue import NnueEvaluator
+        NnueEvaluator.load(args.nnue).attach(board)
     board.display()
 
     # Choose game mode
@@ -62,18 +344,25 @@ def main():
     elif game_mode == '3':
         ai_difficulties['white'] = get_ai_difficulty('White')
         ai_difficulties['black'] = get_ai_difficulty('Black')
+        adjudicator = None
+        if args.resign_score is not None or args.draw_score is not None:
+            adjudicator = Adjudicator(args.resign_score, args.resign_moves,
+                                      args.draw_score, args.draw_moves, args.draw_after)
+        players = {color: (depth, search_options) for color, depth in ai_difficulties.items()}
+        result = play_ai_game(players, board, cache, adjudicator, verbose=True, metrics=metrics, exporter=exporter)
+        if result['adjudication']:
+            print(f"Adjudication: {result['adjudication']}")
+        if args.log:
+            log_game(args.log, board, result['winner'] or ('unfinished' if result['reason'] == 'no moves' else 'draw'))
+        show_summary(board, cache, exporter, search_options.get('eval_cache'))
+        return
 
     current_player = 'white'
 
-    # Initialize move history
-    board_history = {}
     max_repetitions = 3  # Number of allowed repetitions
     move_limit = 1000     # Maximum number of moves to prevent infinite games
     total_moves = 0
-
-    # Add initial board state
-    initial_state = board.get_board_state()
-    board_history[initial_state] = 1
+    log_result = 'unfinished'
 
     while True:
         print(f"{current_player.capitalize()}'s turn")
@@ -81,7 +370,9 @@ def main():
             # AI move
             depth = ai_difficulties[current_player]
             print(f"{current_player.capitalize()} AI is thinking at depth {depth}...")
-            _, ai_move = board.minimax(depth, current_player == 'white')
+            _, ai_move = choose_move(board, depth, current_player, cache, metrics, **search_options)
+            if exporter is not None:
+                exporter.maybe_write()
             if ai_move is None:
                 print(f"{current_player.capitalize()} AI has no moves left. Game over.")
                 break
@@ -90,7 +381,7 @@ def main():
             if not success:
                 print(f"AI attempted an invalid move: {result}")
                 break
-            move_message = f"{current_player.capitalize()} AI moved from {chr(from_pos[1]+97)}{8 - from_pos[0]} to {chr(to_pos[1]+97)}{8 - to_pos[0]}"
+            move_message = f"{current_player.capitalize()} AI moved from {format_square(from_pos)} to {format_square(to_pos)}"
             if result['captured']:
                 captured_piece = result['captured']
                 move_message += f", capturing {captured_piece.color.capitalize()} {captured_piece.name}"
@@ -134,24 +425,25 @@ def main():
         # Check for game over
         game_over, winner = board.is_game_over()
         if game_over:
+            log_result = winner or 'draw'
             if winner:
                 print(f"{winner.capitalize()} wins the game!")
+            elif board.counting is not None:
+                print(f"The game is a draw under the counting rules ({board.counting[1].capitalize()} "
+                      f"counted to {board.count}).")
             else:
                 print("The game is a draw.")
             break
 
         # Check for repetition
-        current_state = board.get_board_state()
-        if current_state in board_history:
-            board_history[current_state] += 1
-            if board_history[current_state] >= max_repetitions:
-                print("The game is a draw due to repetition of board states.")
-                break
-        else:
-            board_history[current_state] = 1
+        if board.repetitions() >= max_repetitions:
+            log_result = 'draw'
+            print("The game is a draw due to repetition of board states.")
+            break
 
         # Check for move limit
         if total_moves >= move_limit:
+            log_result = 'draw'
             print("The game is a draw due to reaching the maximum number of moves.")
             break
 
@@ -164,10 +456,10 @@ def main():
         # print(f"White: {[piece.name for piece in board.get_captured_pieces('white')]}")
         # print(f"Black: {[piece.name for piece in board.get_captured_pieces('black')]}")
 
+    if args.log:
+        log_game(args.log, board, log_result)
     # Display final captured pieces
-    print("\nFinal Captured Pieces:")
-    print(f"White has captured: {[piece.name for piece in board.get_captured_pieces('white')]}")
-    print(f"Black has captured: {[piece.name for piece in board.get_captured_pieces('black')]}")
+    show_summary(board, cache, exporter, search_options.get('eval_cache'))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,259 @@
+# match.py
+"""
+Engine-vs-engine matches decided by a sequential probability ratio test.
+
+Two engine configurations play game pairs from a set of balanced openings,
+swapping colours within each pair, with games running in parallel worker
+processes. After every finished game the log-likelihood ratio of
+"A is elo1 stronger than B" (H1) against "A is elo0 stronger" (H0) is
+updated, and the match stops as soon as it crosses either bound:
+
+    python match.py --engine-a "depth=2,pvs,lmr" --engine-b "depth=2" --elo0 0 --elo1 10
+
+An engine is given as comma-separated settings: depth=N, optionally
+time=SECONDS and nodes=N per move (depth then caps the search), plus any
+of the Searcher options pvs, null_move, lmr and quiescence. Comparing at
+equal time:
+
+    python match.py --engine-a "depth=64,time=0.1,pvs,lmr" --engine-b "depth=64,time=0.1"
+"""
+
+import argparse
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from board import Board
+from makruk_game import Adjudicator, play_ai_game, format_square
+from search import Searcher, OPPONENT, SEARCH_OPTIONS
+
+
+def parse_engine(spec):
+    """
+    Parse an engine description.
+    Args:
+        spec (str): e.g. "depth=3,pvs,lmr" or "depth=64,time=0.1".
+    Returns:
+        tuple: (depth, search options dict) as used by play_ai_game.
+    """
+    depth = 2
+    options = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        if name == 'depth' and value.isdigit():
+            depth = int(value)
+        elif name == 'nodes' and value.isdigit():
+            options['node_limit'] = int(value)
+        elif name == 'time' and value:
+            options['time_limit'] = float(value)
+        elif name in SEARCH_OPTIONS and not value:
+            options[name] = True
+        else:
+            raise ValueError(f"Unknown engine setting {item!r}.")
+    return depth, options
+
+
+def balanced_openings(count, plies=6, seed=0, max_score=0.5, depth=2):
+    """
+    Generate openings by random play, keeping those a search scores as level.
+    Args:
+        count (int): Number of openings.
+        plies (int): Random moves in each opening.
+        seed (int): Random seed, so a match can be repeated.
+        max_score (float): Largest absolute search score accepted.
+        depth (int): Depth of the balance check.
+    Returns:
+        list: Openings as lists of moves in 'e3e4' notation.
+    """
+    rng = random.Random(seed)
+    openings = []
+    seen = set()
+    while len(openings) < count:
+        board = Board()
+        color = 'white'
+        moves = []
+        for _ in range(plies):
+            move = rng.choice(board.get_all_possible_moves(color))
+            board.move_piece(*move)
+            moves.append(format_square(move[0]) + format_square(move[1]))
+            color = OPPONENT[color]
+        if board.is_game_over()[0] or tuple(moves) in seen:
+            continue
+        if abs(Searcher(board).search(depth, color)[0]) <= max_score:
+            seen.add(tuple(moves))
+            openings.append(moves)
+    return openings
+
+
+def play_match_game(opening, white, black, adjudication):
+    """
+    Play one game in a worker process.
+    Args:
+        opening (list): Opening moves.
+        white (tuple): (depth, options) for White.
+        black (tuple): (depth, options) for Black.
+        adjudication (dict): Adjudicator keyword arguments, or None.
+    Returns:
+        dict: The play_ai_game result.
+    """
+    adjudicator = Adjudicator(**adjudication) if adjudication else None
+    return play_ai_game({'white': white, 'black': black}, adjudicator=adjudicator, opening=opening)
+
+
+class SPRT:
+    """
+    Sequential probability ratio test on game results, using the normal
+    approximation to the score distribution (draws included).
+    Args:
+        elo0 (float): Elo difference under H0.
+        elo1 (float): Elo difference under H1.
+        alpha (float): Probability of accepting H1 when H0 holds.
+        beta (float): Probability of accepting H0 when H1 holds.
+    """
+
+    def __init__(self, elo0=0.0, elo1=5.0, alpha=0.05, beta=0.05):
+        self.score0 = self.expected_score(elo0)
+        self.score1 = self.expected_score(elo1)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.wins = self.draws = self.losses = 0
+
+    @staticmethod
+    def expected_score(elo):
+        return 1 / (1 + 10 ** (-elo / 400))
+
+    def record(self, score):
+        """Add one game result for A: 1, 0.5 or 0."""
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def score(self):
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.5
+
+    def llr(self):
+        """Log-likelihood ratio of H1 against H0 for the results so far."""
+        games = self.games
+        if not games:
+            return 0.0
+        # Half a game of each result keeps the variance positive when every
+        # game so far ended the same way
+        wins, draws, losses = self.wins + 0.5, self.draws + 0.5, self.losses + 0.5
+        total = wins + draws + losses
+        mean = (wins + 0.5 * draws) / total
+        variance = (wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2) / total
+        return games * (self.score1 - self.score0) * (2 * mean - self.score0 - self.score1) / (2 * variance)
+
+    def status(self):
+        """
+        Returns:
+            str or None: 'H1' or 'H0' once the test has decided, otherwise None.
+        """
+        llr = self.llr()
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def elo(self):
+        """Elo difference implied by the score so far (clamped away from 0% and 100%)."""
+        mean = min(max(self.score(), 1e-3), 1 - 1e-3)
+        return -400 * math.log10(1 / mean - 1)
+
+
+def run_match(engine_a, engine_b, sprt, openings, workers=None, max_games=10000, adjudication=None, verbose=True):
+    """
+    Play A against B until the SPRT decides or max_games have been played.
+    Args:
+        engine_a (tuple): (depth, options) for engine A.
+        engine_b (tuple): (depth, options) for engine B.
+        sprt (SPRT): Test updated with A's results.
+        openings (list): Openings, each played once with either colour.
+        workers (int): Worker processes; defaults to the CPU count.
+        max_games (int): Upper bound on games played.
+        adjudication (dict): Adjudicator keyword arguments, or None.
+        verbose (bool): Print the running results.
+    Returns:
+        str or None: The SPRT decision, None if max_games was reached first.
+    """
+    def schedule(game):
+        opening = openings[(game // 2) % len(openings)]
+        a_is_white = game % 2 == 0
+        white, black = (engine_a, engine_b) if a_is_white else (engine_b, engine_a)
+        future = pool.submit(play_match_game, opening, white, black, adjudication)
+        pending[future] = a_is_white
+
+    workers = workers or os.cpu_count() or 1
+    pending = {}
+    decision = None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        next_game = 0
+        while next_game < min(workers, max_games):
+            schedule(next_game)
+            next_game += 1
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                a_is_white = pending.pop(future)
+                winner = future.result()['winner']
+                if winner is None:
+                    sprt.record(0.5)
+                else:
+                    sprt.record(1 if (winner == 'white') == a_is_white else 0)
+            decision = sprt.status()
+            if verbose:
+                print(f"games {sprt.games:>5}  +{sprt.wins} ={sprt.draws} -{sprt.losses}  "
+                      f"elo {sprt.elo():+7.1f}  llr {sprt.llr():+6.2f} [{sprt.lower:.2f}, {sprt.upper:.2f}]")
+            if decision is not None:
+                for future in pending:
+                    future.cancel()
+                break
+            while next_game < max_games and len(pending) < workers:
+                schedule(next_game)
+                next_game += 1
+    return decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two engine configurations with an SPRT match.")
+    parser.add_argument('--engine-a', required=True, help="Engine under test, e.g. 'depth=2,pvs,lmr'.")
+    parser.add_argument('--engine-b', required=True, help="Reference engine, e.g. 'depth=2'.")
+    parser.add_argument('--elo0', type=float, default=0.0)
+    parser.add_argument('--elo1', type=float, default=5.0)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--openings', type=int, default=100, help="Number of balanced openings.")
+    parser.add_argument('--opening-plies', type=int, default=6)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--resign-score', type=float, help="Adjudicate resignations at this score.")
+    parser.add_argument('--draw-score', type=float, help="Adjudicate draws within this score of 0.")
+    args = parser.parse_args()
+
+    adjudication = None
+    if args.resign_score is not None or args.draw_score is not None:
+        adjudication = {'resign_score': args.resign_score, 'draw_score': args.draw_score}
+    openings = balanced_openings(args.openings, args.opening_plies, args.seed)
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+    decision = run_match(parse_engine(args.engine_a), parse_engine(args.engine_b), sprt, openings,
+                         args.workers, args.max_games, adjudication)
+    if decision == 'H1':
+        print(f"H1 accepted: A is stronger than B by at least {args.elo1} Elo.")
+    elif decision == 'H0':
+        print(f"H0 accepted: A is not {args.elo1} Elo stronger than B.")
+    else:
+        print("No decision within the game limit.")
+
+
+if __name__ == "__main__":
+    main()
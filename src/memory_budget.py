@@ -0,0 +1,228 @@
+# memory_budget.py
+"""
+One memory budget for an engine process, and diagnostics to check it.
+
+MemoryBudget splits a byte budget between the search stacks (move lists,
+undo records and Python frames, which grow with depth), the NNUE weights
+and per-ply accumulators when an NNUE evaluator is used, an optional
+evaluation cache of a fixed number of entries, and the transposition
+table, which gets whatever is left. The split is computed
+once at startup; a budget too small for the requested depth is rejected
+with MemoryBudgetError rather than discovered mid-game.
+
+The per-structure costs are estimates measured with tracemalloc on
+CPython. Run this module to measure them on the current interpreter and
+compare the actual usage of a search with a budget:
+
+    python memory_budget.py --budget 64M --depth 4
+"""
+
+import argparse
+import time
+import tracemalloc
+
+# Measured with tracemalloc on 64-bit CPython, rounded up
+BOARD_BYTES = 16 * 1024
+STACK_BYTES_PER_PLY = 16 * 1024
+TABLE_ENTRY_BYTES = 384  # One TranspositionTable dict entry with its key and tuple
+SHARED_TABLE_ENTRY_BYTES = 16  # shared_tt.ENTRY_BYTES
+EVAL_CACHE_ENTRY_BYTES = 16  # eval_cache.ENTRY_BYTES
+NNUE_ACCUMULATOR_OVERHEAD = 112  # ndarray header per saved accumulator
+MIN_TABLE_ENTRIES = 1024
+
+_UNITS = {'': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+class MemoryBudgetError(ValueError):
+    """The budget cannot hold the structures the engine needs."""
+
+
+def parse_size(text):
+    """
+    Parse a byte size such as '512K', '64M' or '2G'.
+    Returns:
+        int: Size in bytes.
+    """
+    text = text.strip().upper().removesuffix('B')
+    unit = text[-1:] if text[-1:] in _UNITS else ''
+    try:
+        return int(float(text[:len(text) - len(unit)]) * _UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size {text!r}.") from None
+
+
+def format_size(size):
+    for unit in ('G', 'M', 'K'):
+        if size >= _UNITS[unit]:
+            return f"{size / _UNITS[unit]:.1f}{unit}"
+    return f"{size}B"
+
+
+class MemoryBudget:
+    """
+    Split of a memory budget between the engine's structures.
+    Args:
+        total (int): Budget in bytes.
+        depth (int): Deepest search the engine will run.
+        nnue_hidden (int): Hidden layer size of the NNUE network, None without NNUE.
+        eval_cache_entries (int): Evaluation cache slots (rounded up to a power of two), 0 for none.
+    Raises:
+        MemoryBudgetError: If the budget does not leave room for a minimal table.
+    """
+
+    def __init__(self, total, depth, nnue_hidden=None, eval_cache_entries=0):
+        self.total = total
+        self.depth = depth
+        self.stack_bytes = BOARD_BYTES + depth * STACK_BYTES_PER_PLY
+        self.nnue_bytes = 0
+        if nnue_hidden:
+            from nnue import NUM_FEATURES
+            weights = (NUM_FEATURES + 2) * nnue_hidden * 4
+            self.nnue_bytes = weights + depth * (nnue_hidden * 4 + NNUE_ACCUMULATOR_OVERHEAD)
+        self.eval_cache_entries = 0
+        if eval_cache_entries:
+            self.eval_cache_entries = 2
+            while self.eval_cache_entries < eval_cache_entries:
+                self.eval_cache_entries *= 2
+        self.eval_cache_bytes = self.eval_cache_entries * EVAL_CACHE_ENTRY_BYTES
+        self.table_bytes = total - self.stack_bytes - self.nnue_bytes - self.eval_cache_bytes
+        if self.table_bytes < MIN_TABLE_ENTRIES * TABLE_ENTRY_BYTES:
+            needed = (self.stack_bytes + self.nnue_bytes + self.eval_cache_bytes
+                      + MIN_TABLE_ENTRIES * TABLE_ENTRY_BYTES)
+            raise MemoryBudgetError(f"A {format_size(total)} budget is too small for depth {depth}; "
+                                    f"at least {format_size(needed)} is needed.")
+
+    @property
+    def table_entries(self):
+        """Entry cap for an in-process TranspositionTable."""
+        return self.table_bytes // TABLE_ENTRY_BYTES
+
+    @property
+    def shared_table_entries(self):
+        """Entries for a SharedTranspositionTable, a power of two that fits the table share."""
+        entries = 1
+        while entries * 2 * SHARED_TABLE_ENTRY_BYTES <= self.table_bytes:
+            entries *= 2
+        return entries
+
+    def transposition_table(self):
+        from search import TranspositionTable
+        return TranspositionTable(self.table_entries)
+
+    def eval_cache(self):
+        """An EvalCache of the planned size, or None without one."""
+        if not self.eval_cache_entries:
+            return None
+        from eval_cache import EvalCache
+        return EvalCache(self.eval_cache_entries)
+
+    def report(self):
+        """
+        Returns:
+            dict: Bytes planned for each structure.
+        """
+        return {
+            'total': self.total,
+            'search_stack': self.stack_bytes,
+            'nnue': self.nnue_bytes,
+            'eval_cache': self.eval_cache_bytes,
+            'transposition_table': self.table_bytes,
+        }
+
+
+def measure(budget, positions=4, nnue_path=None):
+    """
+    Run searches under a budget and measure each structure with tracemalloc.
+    Args:
+        budget (MemoryBudget): Budget to check.
+        positions (int): Benchmark positions to search.
+        nnue_path (str): NNUE weights to evaluate with, or None.
+    Returns:
+        dict: Bytes used per structure, and the peak of the whole process heap.
+    """
+    from board import Board
+    from parallel_search import benchmark_positions
+    from search import Searcher
+
+    boards = benchmark_positions(positions)
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        sample = Board()  # Kept alive until it has been measured
+        board_bytes = tracemalloc.get_traced_memory()[0] - start
+        del sample
+
+        evaluator = None
+        nnue_bytes = 0
+        if nnue_path:
+            from nnue import NnueEvaluator
+            before = tracemalloc.get_traced_memory()[0]
+            evaluator = NnueEvaluator.load(nnue_path)
+            nnue_bytes = tracemalloc.get_traced_memory()[0] - before
+
+        before = tracemalloc.get_traced_memory()[0]
+        eval_cache = budget.eval_cache()
+        eval_cache_bytes = tracemalloc.get_traced_memory()[0] - before
+
+        before = tracemalloc.get_traced_memory()[0]
+        table = budget.transposition_table()
+        stack_peak = 0
+        table_bytes = 0
+        for board, color in boards:
+            if evaluator is not None:
+                evaluator.attach(board)
+            searcher = Searcher(board, table, eval_cache=eval_cache)
+            # The table only grows; anything above it at the peak is search stack
+            tracemalloc.reset_peak()
+            searcher.search(budget.depth, color)
+            current, peak = tracemalloc.get_traced_memory()
+            stack_peak = max(stack_peak, peak - current)
+            table_bytes = current - before
+        return {
+            'board': board_bytes,
+            'search_stack': stack_peak,
+            'nnue': nnue_bytes,
+            'eval_cache': eval_cache_bytes,
+            'transposition_table': table_bytes,
+            'table_entries': len(table.entries),
+            'peak': tracemalloc.get_traced_memory()[1],
+        }
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan and check an engine memory budget.")
+    parser.add_argument('--budget', type=parse_size, default=parse_size('64M'), help="e.g. 64M or 1G.")
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--positions', type=int, default=4)
+    parser.add_argument('--nnue', metavar='PATH', help="NNUE weights to include.")
+    parser.add_argument('--eval-cache', type=int, default=0, metavar='ENTRIES', help="Evaluation cache slots.")
+    args = parser.parse_args()
+
+    hidden = None
+    if args.nnue:
+        from nnue import Network
+        hidden = Network.load(args.nnue).hidden_size
+    try:
+        budget = MemoryBudget(args.budget, args.depth, hidden, args.eval_cache)
+    except MemoryBudgetError as e:
+        parser.exit(1, f"{e}\n")
+    print(f"Planned ({format_size(budget.total)} budget, depth {budget.depth}):")
+    for name, size in budget.report().items():
+        print(f"  {name:<20} {format_size(size):>8}")
+    print(f"  {'table entries':<20} {budget.table_entries:>8}")
+
+    started = time.perf_counter()
+    used = measure(budget, args.positions, args.nnue)
+    print(f"Measured over {args.positions} searches ({time.perf_counter() - started:.1f}s, tracemalloc):")
+    for name in ('board', 'search_stack', 'nnue', 'eval_cache', 'transposition_table'):
+        print(f"  {name:<20} {format_size(used[name]):>8}")
+    print(f"  {'table entries':<20} {used['table_entries']:>8}")
+    print(f"  {'heap peak':<20} {format_size(used['peak']):>8}")
+    if used['peak'] > budget.total:
+        print("Warning: the measured peak exceeds the budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# metrics.py
+"""
+Per-move AI metrics in fixed-bucket histograms, exported to a local file.
+
+choose_move records every AI move it is given a MoveMetrics for: wall time,
+CPU time, nodes searched, depth reached, whether the analysis cache
+answered, and transposition table and evaluation cache probes and hits. MetricsExporter writes
+the metrics as a Prometheus text file (paths ending in .prom, suitable for
+node_exporter's textfile collector) or as a JSON snapshot, at most once per
+interval and atomically, so readers never see a half-written file.
+"""
+
+import bisect
+import json
+import os
+import time
+
+WALL_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+NODE_BUCKETS = tuple(4 ** power for power in range(2, 12))
+DEPTH_BUCKETS = tuple(range(1, 17))
+
+HISTOGRAMS = {
+    'wall_seconds': (WALL_BUCKETS, "Wall-clock time per AI move."),
+    'cpu_seconds': (WALL_BUCKETS, "CPU time per AI move."),
+    'nodes': (NODE_BUCKETS, "Nodes searched per AI move."),
+    'depth': (DEPTH_BUCKETS, "Search depth reached per AI move."),
+}
+COUNTERS = {
+    'moves': "AI moves recorded.",
+    'analysis_cache_hits': "AI moves answered by the analysis cache.",
+    'analysis_cache_misses': "AI moves the analysis cache could not answer.",
+    'table_probes': "Transposition table probes.",
+    'table_hits': "Transposition table probes that found an entry.",
+    'eval_cache_probes': "Evaluation cache probes.",
+    'eval_cache_hits': "Evaluation cache probes that found the position.",
+}
+PREFIX = 'makruk_ai_'
+
+
+class Histogram:
+    """
+    Counts of observations in fixed buckets, each bucket holding values up
+    to and including its upper bound, plus an overflow bucket.
+    Args:
+        buckets (tuple): Increasing upper bounds.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation within its bucket, as
+        Prometheus' histogram_quantile does.
+        Args:
+            q (float): Quantile between 0 and 1.
+        Returns:
+            float or None: The estimate, None without observations.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self):
+        return {'count': self.count, 'sum': self.sum, 'p50': self.quantile(0.5), 'p99': self.quantile(0.99)}
+
+
+class MoveMetrics:
+    """Histograms and counters for AI moves."""
+
+    def __init__(self):
+        self.histograms = {name: Histogram(buckets) for name, (buckets, _) in HISTOGRAMS.items()}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def record(self, wall, cpu, nodes, depth, cache_hit=None, table_probes=0, table_hits=0, eval_probes=0,
+               eval_hits=0):
+        """
+        Record one AI move.
+        Args:
+            wall (float): Wall-clock seconds.
+            cpu (float): CPU seconds.
+            nodes (int): Nodes searched.
+            depth (int): Depth reached.
+            cache_hit (bool): Whether the analysis cache answered, None without a cache.
+            table_probes (int): Transposition table probes.
+            table_hits (int): Probes that found an entry.
+            eval_probes (int): Evaluation cache probes.
+            eval_hits (int): Evaluation cache probes that found the position.
+        """
+        for name, value in (('wall_seconds', wall), ('cpu_seconds', cpu), ('nodes', nodes), ('depth', depth)):
+            self.histograms[name].observe(value)
+        counters = self.counters
+        counters['moves'] += 1
+        if cache_hit is not None:
+            counters['analysis_cache_hits' if cache_hit else 'analysis_cache_misses'] += 1
+        counters['table_probes'] += table_probes
+        counters['table_hits'] += table_hits
+        counters['eval_cache_probes'] += eval_probes
+        counters['eval_cache_hits'] += eval_hits
+
+    def to_prometheus(self):
+        """
+        Returns:
+            str: The metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        for name, (_, description) in HISTOGRAMS.items():
+            histogram = self.histograms[name]
+            metric = PREFIX + name
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+        for name, description in COUNTERS.items():
+            metric = PREFIX + name + '_total'
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {self.counters[name]}")
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self):
+        """
+        Returns:
+            dict: Histogram summaries with bucket counts, counters and hit rates.
+        """
+        counters = self.counters
+        lookups = counters['analysis_cache_hits'] + counters['analysis_cache_misses']
+        return {
+            'time': time.time(),
+            'histograms': {name: dict(histogram.summary(), buckets=list(histogram.buckets), counts=histogram.counts)
+                           for name, histogram in self.histograms.items()},
+            'counters': dict(counters),
+            'analysis_cache_hit_rate': counters['analysis_cache_hits'] / lookups if lookups else None,
+            'table_hit_rate': counters['table_hits'] / counters['table_probes'] if counters['table_probes'] else None,
+            'eval_cache_hit_rate': (counters['eval_cache_hits'] / counters['eval_cache_probes']
+                                    if counters['eval_cache_probes'] else None),
+        }
+
+
+class MetricsExporter:
+    """
+    Writes MoveMetrics to a file, Prometheus text for paths ending in .prom
+    and JSON otherwise.
+    Args:
+        metrics (MoveMetrics): Metrics to export.
+        path (str): Output file, replaced on each write.
+        interval (float): Minimum seconds between writes from maybe_write.
+    """
+
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.last_write = None
+
+    def maybe_write(self):
+        """Write if interval seconds have passed since the last write."""
+        if self.last_write is None or time.monotonic() - self.last_write >= self.interval:
+            self.write()
+
+    def write(self):
+        if self.path.endswith('.prom'):
+            text = self.metrics.to_prometheus()
+        else:
+            text = json.dumps(self.metrics.to_json(), indent=2) + '\n'
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as f:
+            f.write(text)
+        os.replace(temporary, self.path)
+        self.last_write = time.monotonic()
@@ -0,0 +1,169 @@
+# nnue.py
+"""
+Small NNUE-style evaluator for Makruk, computed with NumPy on the CPU.
+
+The network has one-hot inputs for every (colour, piece type, square), a
+hidden layer whose pre-activations form the "accumulator", a clipped ReLU
+and a linear output. Because a move only changes two or three inputs, the
+accumulator is updated incrementally: Board.move_piece calls
+Accumulator.push and Board.undo_move calls Accumulator.pop, so each leaf
+evaluation is one clip and one dot product instead of a full board scan
+with move generation.
+
+Weights are stored in an .npz file written by nnue_train.py.
+"""
+
+import hashlib
+
+import numpy as np
+
+from board import PIECE_CODES
+
+NUM_FEATURES = 2 * 6 * 64
+SCORE_SCALE = 10.0  # Converts the network output (expected result in [-1, 1]) to pawns
+WIN_SCORE = 1000.0  # Returned once a Khun has been captured
+
+
+def feature_index(piece, position):
+    """
+    Input index for a piece standing on a square.
+    Args:
+        piece (Piece): The piece.
+        position (tuple): (x, y) coordinates.
+    Returns:
+        int: Index in [0, NUM_FEATURES).
+    """
+    x, y = position
+    color_offset = 0 if piece.color == 'white' else 6 * 64
+    return color_offset + (PIECE_CODES[type(piece)] - 1) * 64 + x * 8 + y
+
+
+def board_features(board):
+    """Indices of the active inputs for a board."""
+    return [feature_index(piece, position)
+            for color in ('white', 'black')
+            for position, piece in board.pieces[color].items()]
+
+
+class Network:
+    """
+    Network weights.
+    Args:
+        input_weights (np.ndarray): (NUM_FEATURES, hidden) first-layer weights.
+        input_bias (np.ndarray): (hidden,) first-layer bias.
+        output_weights (np.ndarray): (hidden,) output weights.
+        output_bias (float): Output bias.
+    """
+
+    def __init__(self, input_weights, input_bias, output_weights, output_bias):
+        self.input_weights = np.asarray(input_weights, dtype=np.float32)
+        self.input_bias = np.asarray(input_bias, dtype=np.float32)
+        self.output_weights = np.asarray(output_weights, dtype=np.float32)
+        self.output_bias = float(output_bias)
+
+    @classmethod
+    def random(cls, hidden=64, seed=0):
+        """Create a small randomly initialised network, the starting point for training."""
+        rng = np.random.default_rng(seed)
+        return cls(rng.normal(0, 0.05, (NUM_FEATURES, hidden)), np.full(hidden, 0.5),
+                   rng.normal(0, 1 / hidden, hidden), 0.0)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['input_weights'], data['input_bias'],
+                       data['output_weights'], data['output_bias'])
+
+    def save(self, path):
+        np.savez(path, input_weights=self.input_weights, input_bias=self.input_bias,
+                 output_weights=self.output_weights, output_bias=np.float32(self.output_bias))
+
+    def fingerprint(self):
+        """Hash of the weights, identifying the network in analysis cache keys."""
+        digest = hashlib.blake2b(digest_size=8)
+        for array in (self.input_weights, self.input_bias, self.output_weights):
+            digest.update(array.tobytes())
+        digest.update(repr(self.output_bias).encode())
+        return digest.hexdigest()
+
+    @property
+    def hidden_size(self):
+        return self.input_bias.shape[0]
+
+    def refresh(self, features):
+        """Compute an accumulator from scratch for a list of active inputs."""
+        return self.input_bias + self.input_weights[features].sum(axis=0)
+
+    def output(self, accumulator):
+        """Network output for an accumulator, an expected result in White's favour."""
+        return float(np.clip(accumulator, 0.0, 1.0) @ self.output_weights) + self.output_bias
+
+
+class Accumulator:
+    """
+    Incrementally updated first-layer state for one Board.
+
+    Each push stores a new array and keeps the previous one on a stack, so
+    pop restores the parent position's accumulator without recomputation.
+    """
+
+    def __init__(self, network, board):
+        self.network = network
+        self.stack = []
+        self.values = network.refresh(board_features(board))
+
+    def push(self, piece, from_pos, to_pos, captured, placed):
+        """
+        Update for a move.
+        Args:
+            piece (Piece): The piece that moved.
+            from_pos (tuple): Its origin.
+            to_pos (tuple): Its destination.
+            captured (Piece): The captured piece, or None.
+            placed (Piece): The piece now on to_pos (a Met after promotion).
+        """
+        weights = self.network.input_weights
+        values = self.values - weights[feature_index(piece, from_pos)] + weights[feature_index(placed, to_pos)]
+        if captured is not None:
+            values -= weights[feature_index(captured, to_pos)]
+        self.stack.append(self.values)
+        self.values = values
+
+    def pop(self):
+        """Restore the accumulator from before the last push."""
+        self.values = self.stack.pop()
+
+    def evaluate(self, board):
+        """
+        Score the board from White's perspective, in the same units as
+        Board.evaluate_board.
+        """
+        if board.khun_positions['white'] is None:
+            return -WIN_SCORE
+        if board.khun_positions['black'] is None:
+            return WIN_SCORE
+        return SCORE_SCALE * self.network.output(self.values)
+
+
+class NnueEvaluator:
+    """Loads a network and attaches accumulators to boards."""
+
+    def __init__(self, network):
+        self.network = network
+
+    @classmethod
+    def load(cls, path):
+        return cls(Network.load(path))
+
+    def attach(self, board):
+        """
+        Make board.evaluate_board use this network, with its accumulator kept
+        up to date by move_piece and undo_move.
+        """
+        board.accumulator = Accumulator(self.network, board)
+        return board
+
+    @staticmethod
+    def detach(board):
+        board.accumulator = None
+        return board
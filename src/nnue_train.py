@@ -0,0 +1,185 @@
+# nnue_train.py
+"""
+Offline trainer for the NNUE evaluator in nnue.py.
+
+Self-play games are JSONL records, one game per line:
+    {"moves": ["e3e4", "d6d5", ...], "result": "white" | "black" | "draw"}
+
+    python nnue_train.py selfplay --games 200 --depth 1 --out games.jsonl
+    python nnue_train.py train games.jsonl --out weights.npz
+
+Every position of every game becomes a training sample whose target is the
+game result from White's point of view (1, 0 or -1), optionally blended with
+the handcrafted evaluation squashed into the same range.
+"""
+
+import argparse
+import json
+import random
+import sys
+
+import numpy as np
+
+from board import Board
+from engine import choose_move
+from makruk_game import parse_square, format_square
+from nnue import Network, NUM_FEATURES, SCORE_SCALE, board_features
+
+RESULT_VALUES = {'white': 1.0, 'black': -1.0, 'draw': 0.0}
+
+
+def play_selfplay_game(depth, rng, random_plies=4, max_moves=200):
+    """
+    Play one engine-vs-engine game, starting with a few random moves for variety.
+    Returns:
+        dict: A self-play record.
+    """
+    board = Board()
+    color = 'white'
+    moves = []
+    seen = {board.position_hash: 1}
+    result = 'draw'
+    for ply in range(max_moves):
+        if ply < random_plies:
+            move = rng.choice(board.get_all_possible_moves(color))
+        else:
+            _, move = choose_move(board, depth, color)
+        if move is None:
+            break
+        board.move_piece(*move)
+        moves.append(format_square(move[0]) + format_square(move[1]))
+        game_over, winner = board.is_game_over()
+        if game_over:
+            result = winner or 'draw'
+            break
+        seen[board.position_hash] = seen.get(board.position_hash, 0) + 1
+        if seen[board.position_hash] >= 3:
+            break
+        color = 'black' if color == 'white' else 'white'
+    return {'moves': moves, 'result': result}
+
+
+def load_samples(paths, eval_weight=0.0):
+    """
+    Replay self-play records into training samples.
+    Args:
+        paths (list): JSONL files to read.
+        eval_weight (float): Share of the target taken from the handcrafted evaluation.
+    Returns:
+        tuple: (list of active-feature lists, np.ndarray of targets)
+    """
+    features = []
+    targets = []
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                result = RESULT_VALUES[record['result']]
+                board = Board()
+                for move in record['moves']:
+                    board.move_piece(parse_square(move[:2]), parse_square(move[2:]))
+                    features.append(board_features(board))
+                    target = result
+                    if eval_weight:
+                        static = np.tanh(board.evaluate_board() / SCORE_SCALE)
+                        target = (1 - eval_weight) * result + eval_weight * static
+                    targets.append(target)
+    return features, np.asarray(targets, dtype=np.float32)
+
+
+def train(network, features, targets, epochs=10, batch_size=256, learning_rate=1e-3, seed=0, log=print):
+    """
+    Fit the network to the samples with Adam on mean squared error.
+    Args:
+        network (Network): Network to update in place.
+        features (list): Active input indices per sample.
+        targets (np.ndarray): Target outputs per sample.
+    Returns:
+        Network: The trained network.
+    """
+    rng = np.random.default_rng(seed)
+    params = [network.input_weights, network.input_bias, network.output_weights,
+              np.array([network.output_bias], dtype=np.float32)]
+    moments = [np.zeros_like(p) for p in params]
+    velocities = [np.zeros_like(p) for p in params]
+    beta1, beta2, epsilon = 0.9, 0.999, 1e-8
+    step = 0
+    for epoch in range(epochs):
+        order = rng.permutation(len(features))
+        total_loss = 0.0
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            inputs = np.zeros((len(batch), NUM_FEATURES), dtype=np.float32)
+            for row, sample in enumerate(batch):
+                inputs[row, features[sample]] = 1.0
+            target = targets[batch]
+
+            pre = inputs @ params[0] + params[1]
+            hidden = np.clip(pre, 0.0, 1.0)
+            output = hidden @ params[2] + params[3][0]
+            error = output - target
+            total_loss += float((error ** 2).sum())
+
+            d_output = 2 * error / len(batch)
+            d_pre = np.outer(d_output, params[2]) * ((pre > 0) & (pre < 1))
+            grads = [inputs.T @ d_pre, d_pre.sum(axis=0), hidden.T @ d_output,
+                     np.array([d_output.sum()], dtype=np.float32)]
+
+            step += 1
+            for param, grad, m, v in zip(params, grads, moments, velocities):
+                m *= beta1
+                m += (1 - beta1) * grad
+                v *= beta2
+                v += (1 - beta2) * grad ** 2
+                m_hat = m / (1 - beta1 ** step)
+                v_hat = v / (1 - beta2 ** step)
+                param -= learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
+        log(f"epoch {epoch + 1}: loss {total_loss / max(len(order), 1):.5f}")
+    network.output_bias = float(params[3][0])
+    return network
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate self-play games and train the NNUE evaluator.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    selfplay = commands.add_parser('selfplay', help="Write self-play games as JSONL.")
+    selfplay.add_argument('--games', type=int, default=100)
+    selfplay.add_argument('--depth', type=int, default=1)
+    selfplay.add_argument('--random-plies', type=int, default=4)
+    selfplay.add_argument('--seed', type=int, default=0)
+    selfplay.add_argument('--out', required=True)
+
+    trainer = commands.add_parser('train', help="Train weights from self-play JSONL files.")
+    trainer.add_argument('games', nargs='+')
+    trainer.add_argument('--out', required=True, help="Output .npz weights file.")
+    trainer.add_argument('--init', help="Continue training from an existing weights file.")
+    trainer.add_argument('--hidden', type=int, default=64)
+    trainer.add_argument('--epochs', type=int, default=10)
+    trainer.add_argument('--batch-size', type=int, default=256)
+    trainer.add_argument('--learning-rate', type=float, default=1e-3)
+    trainer.add_argument('--eval-weight', type=float, default=0.25,
+                         help="Blend of handcrafted evaluation in the target (0 = results only).")
+    trainer.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'selfplay':
+        rng = random.Random(args.seed)
+        with open(args.out, 'a') as out:
+            for game in range(args.games):
+                record = play_selfplay_game(args.depth, rng, args.random_plies)
+                out.write(json.dumps(record) + '\n')
+                print(f"game {game + 1}: {record['result']} in {len(record['moves'])} moves", file=sys.stderr)
+    else:
+        features, targets = load_samples(args.games, args.eval_weight)
+        print(f"{len(features)} positions loaded")
+        network = Network.load(args.init) if args.init else Network.random(args.hidden, args.seed)
+        train(network, features, targets, args.epochs, args.batch_size, args.learning_rate, args.seed)
+        network.save(args.out)
+        print(f"Weights written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# parallel_search.py
+"""
+Multiprocess search sharing one transposition table.
+
+The root moves are searched as separate tasks in a process pool. The first
+(best-ordered) move is searched alone to establish a bound, then the rest
+are searched in parallel against it. Workers receive the position as a
+compact Board.to_bytes snapshot rather than a pickled Board, and all of them
+read and write the same SharedTranspositionTable.
+
+Run as a script to benchmark scaling from 1 to N worker processes:
+
+    python parallel_search.py --depth 3 --max-workers 4
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from board import Board, DRAW_SCORE
+from search import Searcher, INFINITY, OPPONENT
+from shared_tt import SharedTranspositionTable, init_worker, worker_table
+
+
+def _search_root_move(snapshot, history, color, depth, move, alpha):
+    """
+    Search one root move in a worker.
+    Args:
+        history (tuple): The game's Board.hash_stack, so repetitions of its positions score as draws.
+    Returns:
+        tuple: (move, score for color, or None if it cannot beat alpha, nodes searched)
+    """
+    board = Board.from_bytes(snapshot, history)
+    board.move_piece(move[0], move[1])
+    searcher = Searcher(board, worker_table())
+    if board.repetitions() > 1:
+        score = DRAW_SCORE
+    else:
+        score = -searcher.negamax(depth - 1, -INFINITY, -alpha, OPPONENT[color], ply=1)[0]
+    return move, (score if score > alpha else None), searcher.nodes
+
+
+class ParallelSearcher:
+    """
+    Process pool and shared transposition table reused across searches.
+    Args:
+        workers (int): Worker processes; defaults to the CPU count.
+        table_entries (int): Shared transposition table size.
+    """
+
+    def __init__(self, workers=None, table_entries=1 << 20):
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(table_entries)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                        initargs=(self.table.name, self.table.entries))
+
+    def search(self, board, depth, color):
+        """
+        Search a position using all workers.
+        Args:
+            board (Board): Position to search. It is not modified.
+            depth (int): Search depth in plies.
+            color (str): Side to move.
+        Returns:
+            tuple: (score from White's perspective, best move or None, nodes searched)
+        """
+        moves = board.get_all_possible_moves(color)
+        if not moves or depth < 2 or board.is_game_over()[0]:
+            searcher = Searcher(board)
+            score, move = searcher.search(depth, color)
+            return score, move, searcher.nodes
+        # Shallow search in the parent to order the root moves
+        orderer = Searcher(board)
+        _, first_move = orderer.search(1, color)
+        moves = orderer.order_moves(moves, first_move)
+
+        snapshot = board.to_bytes()
+        history = tuple(board.hash_stack)
+        nodes = orderer.nodes
+        best_move, best_score, first_nodes = self.pool.submit(
+            _search_root_move, snapshot, history, color, depth, moves[0], -INFINITY).result()
+        nodes += first_nodes
+        futures = [self.pool.submit(_search_root_move, snapshot, history, color, depth, move, best_score)
+                   for move in moves[1:]]
+        for future in as_completed(futures):
+            move, score, move_nodes = future.result()
+            nodes += move_nodes
+            if score is not None and score > best_score:
+                best_score, best_move = score, move
+        return (best_score if color == 'white' else -best_score), best_move, nodes
+
+    def close(self):
+        self.pool.shutdown()
+        self.table.close()
+        self.table.unlink()
+
+
+def parallel_search(board, depth, color, workers=None, table_entries=1 << 20):
+    """One-off ParallelSearcher.search with its own pool and table."""
+    searcher = ParallelSearcher(workers, table_entries)
+    try:
+        return searcher.search(board, depth, color)
+    finally:
+        searcher.close()
+
+
+def benchmark_positions(count, seed=0, plies=12):
+    """Positions reached by random play from the opening, for benchmarking."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board()
+        color = 'white'
+        for _ in range(plies):
+            board.move_piece(*rng.choice(board.get_all_possible_moves(color)))
+            color = OPPONENT[color]
+        if not board.is_game_over()[0]:
+            positions.append((Board.from_bytes(board.to_bytes()), color))
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel search scaling.")
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--positions', type=int, default=4)
+    parser.add_argument('--table-entries', type=int, default=1 << 20)
+    args = parser.parse_args()
+
+    positions = benchmark_positions(args.positions)
+    baseline = None
+    print(f"{'workers':>7} {'seconds':>8} {'nodes':>9} {'nodes/s':>9} {'speedup':>7}")
+    for workers in range(1, args.max_workers + 1):
+        searcher = ParallelSearcher(workers, args.table_entries)
+        # Keep pool start-up out of the timing
+        searcher.pool.submit(os.getpid).result()
+        started = time.perf_counter()
+        nodes = 0
+        for board, color in positions:
+            searcher.table.clear()
+            nodes += searcher.search(board, args.depth, color)[2]
+        elapsed = time.perf_counter() - started
+        searcher.close()
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {nodes:>9} {nodes / elapsed:>9.0f} {baseline / elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
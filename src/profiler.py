@@ -0,0 +1,180 @@
+# profiler.py
+"""
+Opt-in profiling of individual AI moves.
+
+A MoveProfiler handed to engine.choose_move profiles the searches of
+selected moves, or of every move, keeping those that take longer than a
+threshold. makruk_game.py builds one from --profile DIR and the related
+flags. Any other process that goes through choose_move, such as session
+server workers, picks one up from the environment:
+
+    MAKRUK_PROFILE=profiles MAKRUK_PROFILE_THRESHOLD=2 python session_server.py
+
+MAKRUK_PROFILE_MOVES=12,30 selects plies, MAKRUK_PROFILE_FORMAT picks the
+output and MAKRUK_PROFILE_INTERVAL the sampling interval. With neither
+moves nor a threshold every move is written. When no profiler is set,
+choose_move skips all of this.
+
+A move's ply is taken from the board's move stack unless the caller
+passes it to choose_move. Boards rebuilt from snapshots have no move
+stack, so callers searching them, like the session server, pass the
+ply of the game they belong to.
+
+The 'collapsed' output (the default) comes from a thread that samples the
+search thread's stack every interval; each line is 'frame;frame;... count',
+the input of flamegraph.pl and speedscope. 'pstats' runs cProfile instead,
+which is exact but slows the search several times over, so pair it with
+selected moves rather than a threshold.
+
+Files are named ply<ply>-<color>-<position hash>.<format> and each one gets
+a line in index.jsonl in the same directory with the position (to_fen),
+wall time, nodes and depth.
+"""
+
+import collections
+import cProfile
+import json
+import os
+import sys
+import threading
+
+FORMATS = ('collapsed', 'pstats')
+DEFAULT_INTERVAL = 0.005
+
+
+def parse_moves(text):
+    """Parse a comma-separated list of plies such as '12,30'."""
+    return frozenset(int(ply) for ply in text.split(',') if ply.strip())
+
+
+class StackSampler:
+    """
+    Counts the stacks of one thread, sampled from a background thread.
+    Args:
+        thread_id (int): threading.get_ident() of the thread to sample.
+        interval (float): Seconds between samples.
+    """
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = collections.Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        """Stop sampling; returns the stack counts."""
+        self.stopped.set()
+        self.thread.join()
+        return self.counts
+
+
+class MoveProfiler:
+    """
+    Profiles AI moves and writes one file per kept move.
+    Args:
+        directory (str): Output directory, created if needed.
+        moves (iterable): Plies to profile (1 for the first move of the game).
+        threshold (float): Also keep any move taking at least this many seconds.
+        output (str): 'collapsed' or 'pstats'.
+        interval (float): Seconds between stack samples for 'collapsed'.
+    """
+
+    def __init__(self, directory, moves=(), threshold=None, output='collapsed', interval=DEFAULT_INTERVAL):
+        if output not in FORMATS:
+            raise ValueError(f"Unknown profile format {output!r}; expected one of {', '.join(FORMATS)}.")
+        self.directory = directory
+        self.moves = frozenset(moves)
+        self.threshold = threshold
+        self.output = output
+        self.interval = interval
+        self.lock = threading.Lock()  # Guards index.jsonl when moves end in several threads
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_environ(cls, environ=os.environ):
+        """
+        Build a profiler from the MAKRUK_PROFILE variables.
+        Returns:
+            MoveProfiler or None: None when MAKRUK_PROFILE is not set.
+        """
+        directory = environ.get('MAKRUK_PROFILE')
+        if not directory:
+            return None
+        threshold = environ.get('MAKRUK_PROFILE_THRESHOLD')
+        return cls(directory, parse_moves(environ.get('MAKRUK_PROFILE_MOVES', '')),
+                   float(threshold) if threshold else None,
+                   environ.get('MAKRUK_PROFILE_FORMAT', 'collapsed'),
+                   float(environ.get('MAKRUK_PROFILE_INTERVAL', DEFAULT_INTERVAL)))
+
+    def begin(self, board, color, ply=None):
+        """
+        Start profiling a move if it may be kept.
+        Args:
+            board (Board): Position about to be searched.
+            color (str): Side to move.
+            ply (int): Ply of the move in its game; from the board's move stack if omitted.
+        Returns:
+            dict or None: Session to pass to end, None if the move is not profiled.
+        """
+        if ply is None:
+            ply = len(board.move_stack) + 1
+        if self.moves and self.threshold is None and ply not in self.moves:
+            return None
+        session = {'ply': ply, 'color': color, 'hash': board.position_hash, 'fen': board.to_fen(color)}
+        if self.output == 'pstats':
+            session['profile'] = cProfile.Profile()
+            session['profile'].enable()
+        else:
+            session['sampler'] = StackSampler(threading.get_ident(), self.interval).start()
+        return session
+
+    def end(self, session, wall, nodes=None, depth=None):
+        """
+        Stop profiling a move and write it out if it is kept.
+        Args:
+            session (dict): Result of begin.
+            wall (float): Seconds the move took.
+            nodes (int): Nodes searched.
+            depth (int): Depth reached.
+        Returns:
+            str or None: Path of the written profile.
+        """
+        if self.output == 'pstats':
+            session['profile'].disable()
+        else:
+            counts = session['sampler'].stop()
+        selected = session['ply'] in self.moves
+        slow = self.threshold is not None and wall >= self.threshold
+        if not (selected or slow or (not self.moves and self.threshold is None)):
+            return None
+
+        name = f"ply{session['ply']:03d}-{session['color']}-{session['hash']:016x}.{self.output}"
+        path = os.path.join(self.directory, name)
+        if self.output == 'pstats':
+            session['profile'].dump_stats(path)
+        else:
+            with open(path, 'w') as f:
+                for stack, count in counts.most_common():
+                    f.write(f"{stack} {count}\n")
+        entry = {'file': name, 'ply': session['ply'], 'color': session['color'], 'fen': session['fen'],
+                 'wall_seconds': wall, 'nodes': nodes, 'depth': depth,
+                 'reason': 'selected' if selected else 'slow' if slow else 'all'}
+        with self.lock, open(os.path.join(self.directory, 'index.jsonl'), 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+        return path
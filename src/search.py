@@ -0,0 +1,488 @@
+# search.py
+"""
+Alpha-beta search with a transposition table.
+
+Searcher runs negamax with alpha-beta pruning and iterative deepening,
+making and unmaking moves on one position. Scores inside the search are
+from the side to move's point of view; Searcher.search converts the result
+back to White's perspective so it can stand in for Board.minimax.
+
+The search does not depend on the rules: it drives a position adapter from
+variants.py, MakrukPosition for a Makruk Board (wrapped automatically) or
+ChessPosition for the chess rules used by the chess GUI.
+
+A move back into a position that already occurred in the game or on the
+search path is scored as a draw. The positions keep a count per position
+key, so the check is a dictionary lookup per node.
+
+With quiescence enabled, leaf positions are not evaluated until captures
+and promotions have been played out. Captures that lose material by static
+exchange evaluation (SEE) are skipped there, which keeps the extra nodes to
+a fraction of a full ply.
+
+Searches can be limited by depth, node count and time, and stopped from
+another thread; iterative deepening then returns the result of the last
+completed iteration. SearchHandle runs a search in a background thread so
+callers can poll it, stop it or wait for it.
+
+Transposition tables share one interface: probe(key) returns
+(depth, flag, score, move) or None, and store(key, depth, flag, score, move)
+records a result. TranspositionTable below is the in-process version;
+shared_tt.SharedTranspositionTable is shared between worker processes.
+"""
+
+import threading
+import time
+
+from board import DRAW_SCORE
+from variants import SearchPosition, MakrukPosition, OPPONENT
+
+INFINITY = float('inf')
+
+# Width of a zero window; scores are floats, so "one unit" is a small epsilon
+WINDOW = 1e-6
+
+# Searcher flags for the selective features, which change search results
+SEARCH_OPTIONS = ('pvs', 'null_move', 'lmr', 'quiescence')
+
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3  # Moves searched at full depth before reductions start
+
+# Bound types for stored scores
+EXACT, LOWER, UPPER = 0, 1, 2
+
+TIME_CHECK_NODES = 1024  # Nodes between clock checks in a timed search
+
+
+MAX_DEPTH = 64  # Depth cap for searches limited only by nodes or time
+
+
+class SearchStopped(Exception):
+    """Raised inside a search when a limit is reached or a stop is requested."""
+
+
+class TranspositionTable:
+    """
+    In-process transposition table.
+    Args:
+        max_entries (int): Size cap; the oldest entries are dropped beyond it.
+    """
+
+    def __init__(self, max_entries=1 << 20):
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def probe(self, key):
+        return self.entries.get(key)
+
+    def store(self, key, depth, flag, score, move):
+        entries = self.entries
+        previous = entries.get(key)
+        if previous is not None and previous[0] > depth:
+            return
+        if previous is None and len(entries) >= self.max_entries:
+            del entries[next(iter(entries))]
+        entries[key] = (depth, flag, score, move)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class Searcher:
+    """
+    Alpha-beta searcher for one position.
+
+    The selective features are off by default and can be enabled separately
+    to measure their effect on node count and playing strength:
+    principal variation search (zero-window searches of later moves with a
+    re-search on fail-high), null-move pruning (skipped when either side has
+    a bare Khun, where zugzwang is common) and late-move reductions for quiet
+    moves. Quiescence search extends leaves with captures and promotions.
+    Args:
+        board: Board or variants position adapter to search; moves are made
+            and unmade in place.
+        table: Transposition table, a new TranspositionTable if omitted.
+        pvs (bool): Use principal variation search.
+        null_move (bool): Use null-move pruning.
+        lmr (bool): Use late-move reductions.
+        quiescence (bool): Search captures and promotions at the leaves.
+        eval_cache (EvalCache): Cache for static evaluations, or None.
+    """
+
+    def __init__(self, board, table=None, pvs=False, null_move=False, lmr=False, quiescence=False,
+                 eval_cache=None):
+        self.position = board if isinstance(board, SearchPosition) else MakrukPosition(board)
+        self.table = table if table is not None else TranspositionTable()
+        self.pvs = pvs
+        self.null_move = null_move
+        self.lmr = lmr
+        self.quiescence = quiescence
+        # Scores this far from MATE_SCORE are mates, stored relative to their node
+        mate_score = self.position.MATE_SCORE
+        self.mate_bound = None if mate_score is None else mate_score - MAX_DEPTH - 1
+        self.eval_cache = eval_cache
+        self.nodes = 0
+        self.deadline = None  # perf_counter() time at which a timed search stops
+        self.node_limit = None
+        self.stop_requested = False  # Set from another thread to stop the search
+        self.completed_depth = 0  # Deepest finished iteration of the last search
+        self.result = (0, None)  # (White's score, move) of the last completed iteration
+        self.stats = {'null_cutoffs': 0, 'pvs_researches': 0, 'lmr_researches': 0,
+                      'quiescence_nodes': 0, 'see_pruned': 0, 'table_probes': 0, 'table_hits': 0,
+                      'eval_probes': 0, 'eval_hits': 0}
+
+    def evaluate(self):
+        """Static evaluation from White's perspective, through the evaluation cache if there is one."""
+        cache = self.eval_cache
+        if cache is None:
+            return self.position.evaluate()
+        key = self.position.eval_key()
+        self.stats['eval_probes'] += 1
+        score = cache.probe(key)
+        if score is None:
+            score = self.position.evaluate()
+            cache.store(key, score)
+        else:
+            self.stats['eval_hits'] += 1
+        return score
+
+    def quiesce(self, alpha, beta, color):
+        """
+        Search captures and promotions until the position is quiet.
+        Args:
+            alpha (float): Lower bound of the search window.
+            beta (float): Upper bound of the search window.
+            color (str): Side to move.
+        Returns:
+            float: Score for the side to move.
+        """
+        self.nodes += 1
+        self.stats['quiescence_nodes'] += 1
+        self.check_limits()
+        position = self.position
+        sign = 1 if color == 'white' else -1
+        # Standing pat: the side to move is not forced to capture
+        game_over, winner = position.outcome()
+        if game_over and winner is None:
+            return DRAW_SCORE
+        best_score = sign * self.evaluate()
+        if best_score >= beta or game_over:
+            return best_score
+        alpha = max(alpha, best_score)
+
+        opponent = OPPONENT[color]
+        for move in self.order_moves(position.tactical_moves(color), None):
+            if position.see(move) < 0:
+                self.stats['see_pruned'] += 1
+                continue
+            position.make(move)
+            score = -self.quiesce(-beta, -alpha, opponent)
+            position.unmake()
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def check_limits(self):
+        if self.stop_requested or (self.node_limit is not None and self.nodes >= self.node_limit):
+            raise SearchStopped()
+        if self.deadline is not None and not self.nodes % TIME_CHECK_NODES and time.perf_counter() >= self.deadline:
+            raise SearchStopped()
+
+    def null_move_allowed(self, depth, beta, color):
+        return (self.null_move and depth >= NULL_MOVE_MIN_DEPTH and beta < INFINITY
+                and self.position.null_move_allowed(color))
+
+    def order_moves(self, moves, table_move):
+        """Put the table move first, then captures of valuable pieces by cheap ones."""
+        capture_values = self.position.capture_values
+
+        def priority(move):
+            if move == table_move:
+                return -INFINITY
+            victim, attacker = capture_values(move)
+            if not victim:
+                return 0
+            return -(victim * 10 - attacker)
+
+        return sorted(moves, key=priority)
+
+    def to_table(self, score, ply):
+        """Make a mate score relative to the current node before storing it."""
+        bound = self.mate_bound
+        if bound is not None:
+            if score >= bound:
+                return score + ply
+            if score <= -bound:
+                return score - ply
+        return score
+
+    def from_table(self, score, ply):
+        """Make a stored mate score relative to the root again."""
+        bound = self.mate_bound
+        if bound is not None:
+            if score >= bound:
+                return score - ply
+            if score <= -bound:
+                return score + ply
+        return score
+
+    def negamax(self, depth, alpha, beta, color, allow_null=True, ply=0):
+        """
+        Search the current position.
+        Args:
+            depth (int): Remaining depth in plies.
+            alpha (float): Lower bound of the search window.
+            beta (float): Upper bound of the search window.
+            color (str): Side to move.
+            allow_null (bool): False directly after a null move.
+            ply (int): Distance from the root, for mate scores.
+        Returns:
+            tuple: (score for the side to move, best move or None)
+        """
+        if depth <= 0 and self.quiescence:
+            return self.quiesce(alpha, beta, color), None
+        self.nodes += 1
+        self.check_limits()
+        position = self.position
+        sign = 1 if color == 'white' else -1
+        game_over, winner = position.outcome()
+        if game_over and winner is None:
+            return DRAW_SCORE, None
+        if depth <= 0 or game_over:
+            return sign * self.evaluate(), None
+
+        key = position.key(color)
+        original_alpha = alpha
+        table_move = None
+        entry = self.table.probe(key)
+        self.stats['table_probes'] += 1
+        if entry is not None:
+            self.stats['table_hits'] += 1
+            entry_depth, flag, score, table_move = entry
+            score = self.from_table(score, ply)
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score, table_move
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score, table_move
+
+        opponent = OPPONENT[color]
+        if allow_null and self.null_move_allowed(depth, beta, color):
+            # Let the opponent move twice; if we still reach beta, prune
+            position.make_null()
+            score = -self.negamax(depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + WINDOW, opponent, False, ply + 1)[0]
+            position.unmake_null()
+            if score >= beta:
+                self.stats['null_cutoffs'] += 1
+                return score, None
+
+        moves = position.legal_moves(color)
+        if not moves:
+            return position.no_moves_score(color, ply), None
+
+        best_score = -INFINITY
+        best_move = None
+        for index, move in enumerate(self.order_moves(moves, table_move)):
+            reduction = 0
+            if self.lmr and index >= LMR_FULL_MOVES and depth >= LMR_MIN_DEPTH and position.is_quiet(move):
+                reduction = 1
+            position.make(move)
+            if position.is_repetition():
+                # Back to a position from the game or the search path
+                score = DRAW_SCORE
+            elif index == 0:
+                score = -self.negamax(depth - 1, -beta, -alpha, opponent, ply=ply + 1)[0]
+            elif self.pvs:
+                score = -self.negamax(depth - 1 - reduction, -alpha - WINDOW, -alpha, opponent, ply=ply + 1)[0]
+                if score > alpha and reduction:
+                    self.stats['lmr_researches'] += 1
+                    score = -self.negamax(depth - 1, -alpha - WINDOW, -alpha, opponent, ply=ply + 1)[0]
+                if alpha < score < beta:
+                    self.stats['pvs_researches'] += 1
+                    score = -self.negamax(depth - 1, -beta, -alpha, opponent, ply=ply + 1)[0]
+            else:
+                score = -self.negamax(depth - 1 - reduction, -beta, -alpha, opponent, ply=ply + 1)[0]
+                if score > alpha and reduction:
+                    self.stats['lmr_researches'] += 1
+                    score = -self.negamax(depth - 1, -beta, -alpha, opponent, ply=ply + 1)[0]
+            position.unmake()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, flag, self.to_table(best_score, ply), best_move)
+        return best_score, best_move
+
+    def search(self, depth, color, time_limit=None, node_limit=None, deadline=None):
+        """
+        Iteratively deepen to the given depth, or until a limit is reached or
+        stop_requested is set, in which case the last completed iteration is
+        returned.
+        Args:
+            depth (int): Search depth in plies.
+            color (str): Side to move.
+            time_limit (float): Seconds the search may take.
+            node_limit (int): Nodes the search may visit.
+            deadline (float): time.perf_counter() value by which to stop.
+        Returns:
+            tuple: (evaluation score from White's perspective, best move or None)
+        """
+        position = self.position
+        mark = position.mark()
+        if time_limit is not None:
+            end = time.perf_counter() + time_limit
+            deadline = end if deadline is None else min(deadline, end)
+        self.deadline = deadline
+        self.node_limit = None if node_limit is None else self.nodes + node_limit
+        self.completed_depth = 0
+        self.result = (0, None)
+        sign = 1 if color == 'white' else -1
+        score, move = 0, None
+        try:
+            for iteration in range(1, depth + 1):
+                score, move = self.negamax(iteration, -INFINITY, INFINITY, color)
+                self.completed_depth = iteration
+                self.result = (sign * score, move)
+        except SearchStopped:
+            position.unwind(mark)
+            if self.completed_depth == 0:
+                # Not even one ply finished: fall back to the best-ordered move
+                moves = position.legal_moves(color)
+                move = self.order_moves(moves, None)[0] if moves else None
+                score = sign * self.evaluate()
+                self.result = (sign * score, move)
+        finally:
+            self.deadline = None
+            self.node_limit = None
+        return sign * score, move
+
+    def principal_variation(self, color, length, first_move=None):
+        """
+        Follow best moves through the transposition table from the root.
+        Args:
+            color (str): Side to move at the root.
+            length (int): Maximum number of moves.
+            first_move (tuple): Root move to start with instead of the table move.
+        Returns:
+            list: Moves, as ((x1, y1), (x2, y2)) for a Makruk Board.
+        """
+        position = self.position
+        pv = []
+        seen = set()
+        while len(pv) < length and not position.outcome()[0]:
+            key = position.key(color)
+            entry = self.table.probe(key)
+            move = first_move if not pv and first_move is not None else entry and entry[3]
+            if move is None or key in seen or not position.is_legal(move, color):
+                break
+            seen.add(key)
+            position.make(move)
+            pv.append(move)
+            color = OPPONENT[color]
+        for _ in pv:
+            position.unmake()
+        return pv
+
+
+class SearchHandle:
+    """
+    A search running in a background thread.
+
+    The position is searched in place, so it must not be used until the
+    search has finished. Limits combine: the search ends at whichever is reached
+    first, and stop() ends it early. Every way of ending returns the best
+    move of the last completed iteration.
+    Args:
+        board: Board or variants position adapter to search.
+        color (str): Side to move.
+        depth (int): Depth limit in plies.
+        node_limit (int): Node limit, or None.
+        time_limit (float): Seconds from start(), or None.
+        deadline (float): time.perf_counter() value to stop by, or None.
+        table: Transposition table for the Searcher.
+        **options: Searcher options.
+    """
+
+    def __init__(self, board, color, depth=MAX_DEPTH, node_limit=None, time_limit=None, deadline=None,
+                 table=None, **options):
+        self.searcher = Searcher(board, table, **options)
+        self.color = color
+        self.depth = depth
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.deadline = deadline
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        """Start searching; returns the handle."""
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.searcher.search(self.depth, self.color, self.time_limit, self.node_limit, self.deadline)
+        except Exception as e:
+            self.error = e
+
+    def done(self):
+        return self.thread is not None and not self.thread.is_alive()
+
+    def poll(self):
+        """
+        Progress so far.
+        Returns:
+            dict: done, completed depth, nodes, and the score (White's
+            perspective) and move of the last completed iteration.
+        """
+        score, move = self.searcher.result
+        return {'done': self.done(), 'depth': self.searcher.completed_depth,
+                'nodes': self.searcher.nodes, 'score': score, 'move': move}
+
+    def wait(self, timeout=None):
+        """
+        Wait for the search to end.
+        Args:
+            timeout (float): Seconds to wait, or None to wait until it ends.
+        Returns:
+            tuple or None: (score, move) once finished, None if still running after timeout.
+        """
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            return None
+        if self.error is not None:
+            raise self.error
+        return self.searcher.result
+
+    def stop(self):
+        """
+        Stop the search and wait for it to unwind.
+        Returns:
+            tuple: (score, move) of the last completed iteration.
+        """
+        self.searcher.stop_requested = True
+        try:
+            return self.wait()
+        finally:
+            self.searcher.stop_requested = False
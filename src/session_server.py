@@ -0,0 +1,389 @@
+# session_server.py
+"""
+Asyncio server hosting many Makruk game sessions over TCP or a Unix socket.
+
+Clients send newline-delimited JSON requests and get one JSON response per
+request, carrying the request's "id" so requests may be pipelined. AI searches
+run in a bounded process pool whose workers share one transposition table,
+so positions searched for one request speed up later ones. Sessions with queued AI requests take turns for
+pool slots in round-robin order, each session has at most one search in flight,
+and a session may only queue a limited number of AI requests before it is told
+to back off. Sessions belong to the connection that opened them and are
+closed when it disconnects, so abandoned games do not pile up.
+
+Requests:
+    {"op": "new"}                                    -> {"session": sid}
+    {"op": "move", "session": sid, "move": "e3e4"}   -> play a human move
+    {"op": "ai", "session": sid, "depth": 2}         -> search and play the AI move
+    {"op": "analyse", "session": sid, "depth": 2}    -> search without playing
+    {"op": "state", "session": sid}                  -> board, side to move, history
+    {"op": "close", "session": sid}
+    {"op": "stats"}                                  -> sessions, queue and latency
+"""
+
+import argparse
+import asyncio
+import collections
+import functools
+import itertools
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from board import Board
+from engine import choose_move_from_snapshot
+from makruk_game import parse_square, format_square
+from shared_tt import SharedTranspositionTable, init_worker, worker_table
+
+MAX_REPETITIONS = 3  # Occurrences of a position that draw the game, as in makruk_game
+
+
+def _search_snapshot(snapshot, history, depth, color, ply):
+    """choose_move_from_snapshot in a pool worker, with the shared table if the worker has one."""
+    return choose_move_from_snapshot(snapshot, depth, color, history, ply=ply, table=worker_table())
+
+
+class ServerError(Exception):
+    """A rejected request; the message is sent back to the client."""
+
+
+class LatencyStats:
+    """Latency counters with a bounded window of recent samples for percentiles."""
+
+    def __init__(self, window=10000):
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self):
+        """
+        Summarise the recorded latencies.
+        Returns:
+            dict: count, mean and p50/p99/max over the recent window, in milliseconds.
+        """
+        if not self.samples:
+            return {'count': self.count}
+        ordered = sorted(self.samples)
+
+        def percentile(p):
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3),
+            'p50_ms': percentile(0.50),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(ordered[-1] * 1000, 3),
+        }
+
+
+class Session:
+    """One game: a Board, the side to move, the move history and queued AI jobs."""
+
+    def __init__(self, session_id):
+        self.id = session_id
+        self.board = Board()
+        self.to_move = 'white'
+        self.history = []
+        self.jobs = collections.deque()
+        self.busy = False  # A search for this session is running in the pool
+        self.closed = False
+        self.game_over = False
+        self.winner = None
+
+    def play(self, from_pos, to_pos):
+        """
+        Play a move for the side to move.
+        Returns:
+            dict: The move_piece result.
+        Raises:
+            ServerError: If the game is over or the move is not allowed.
+        """
+        if self.game_over:
+            raise ServerError("The game is over.")
+        piece = self.board.grid[from_pos[0]][from_pos[1]]
+        if piece is not None and piece.color != self.to_move:
+            raise ServerError("It is not that side's turn.")
+        success, result = self.board.move_piece(from_pos, to_pos)
+        if not success:
+            raise ServerError(result)
+        self.history.append(format_square(from_pos) + format_square(to_pos))
+        self.to_move = 'black' if self.to_move == 'white' else 'white'
+        self.game_over, self.winner = self.board.is_game_over()
+        if not self.game_over and self.board.repetitions() >= MAX_REPETITIONS:
+            self.game_over = True
+        return result
+
+    def describe(self):
+        return {
+            'session': self.id,
+            'to_move': self.to_move,
+            'board': [''.join(row) for row in self.board.get_board_state()],
+            'history': self.history,
+            'game_over': self.game_over,
+            'winner': self.winner,
+        }
+
+
+class SessionServer:
+    """
+    Session registry and fair scheduler in front of a process pool.
+    Args:
+        workers (int): Number of worker processes, which bounds concurrent searches.
+        max_pending (int): AI requests a single session may have queued.
+        max_sessions (int): Maximum number of open sessions.
+        max_depth (int): Deepest search a client may request.
+        executor (Executor): Pool to run searches in; by default a ProcessPoolExecutor
+            whose workers share a transposition table.
+        table_entries (int): Size of that shared table.
+    """
+
+    def __init__(self, workers=2, max_pending=4, max_sessions=10000, max_depth=4, executor=None,
+                 table_entries=1 << 20):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_sessions = max_sessions
+        self.max_depth = max_depth
+        self.table = None
+        if executor is None:
+            self.table = SharedTranspositionTable(table_entries)
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                           initargs=(self.table.name, self.table.entries))
+        self.executor = executor
+        self.sessions = {}
+        self.ready = collections.deque()  # Sessions with queued jobs and no search in flight
+        self.in_flight = 0
+        self.queued = 0
+        self.tasks = set()
+        self.ids = itertools.count(1)
+        self.request_latency = LatencyStats()
+        self.ai_latency = LatencyStats()
+
+    def get_session(self, request):
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise ServerError("Unknown session.")
+        return session
+
+    def close_session(self, session):
+        """Forget a session and fail its queued AI requests; a search in flight is not played."""
+        session.closed = True
+        del self.sessions[session.id]
+        while session.jobs:
+            _, _, future, _ = session.jobs.popleft()
+            self.queued -= 1
+            future.set_exception(ServerError("Session closed."))
+
+    async def handle_request(self, request, owned=None):
+        """
+        Execute one request.
+        Args:
+            request (dict): Decoded JSON request.
+            owned (set): Ids of the sessions opened on the requesting connection,
+                updated by new and close.
+        Returns:
+            dict: Response fields (without id and latency).
+        """
+        op = request.get('op')
+        if op == 'new':
+            if len(self.sessions) >= self.max_sessions:
+                raise ServerError("Too many sessions.")
+            session = Session(next(self.ids))
+            self.sessions[session.id] = session
+            if owned is not None:
+                owned.add(session.id)
+            return {'session': session.id}
+        if op == 'stats':
+            return self.stats()
+        session = self.get_session(request)
+        if op == 'state':
+            return session.describe()
+        if op == 'close':
+            self.close_session(session)
+            if owned is not None:
+                owned.discard(session.id)
+            return {'closed': session.id}
+        if op == 'move':
+            if session.jobs or session.busy:
+                raise ServerError("An AI request is pending for this session.")
+            if session.game_over:
+                raise ServerError("The game is over.")
+            move = request.get('move', '')
+            from_pos, to_pos = parse_square(move[:2]), parse_square(move[2:])
+            if len(move) != 4 or from_pos is None or to_pos is None:
+                raise ServerError("Invalid move format.")
+            result = session.play(from_pos, to_pos)
+            return {'move': move, 'captured': result['captured'].name if result['captured'] else None,
+                    'game_over': session.game_over, 'winner': session.winner}
+        if op in ('ai', 'analyse'):
+            depth = request.get('depth', 2)
+            if not isinstance(depth, int) or not 1 <= depth <= self.max_depth:
+                raise ServerError(f"Depth must be between 1 and {self.max_depth}.")
+            if session.game_over:
+                raise ServerError("The game is over.")
+            if len(session.jobs) + session.busy >= self.max_pending:
+                raise ServerError("Too many pending requests for this session.")
+            future = asyncio.get_running_loop().create_future()
+            session.jobs.append((op, depth, future, time.perf_counter()))
+            self.queued += 1
+            if not session.busy and len(session.jobs) == 1:
+                self.ready.append(session)
+            self.schedule()
+            return await future
+        raise ServerError(f"Unknown op {op!r}.")
+
+    def schedule(self):
+        """Hand queued jobs to free pool slots, one session at a time in turn."""
+        while self.ready and self.in_flight < self.workers:
+            session = self.ready.popleft()
+            if session.closed or not session.jobs:
+                continue
+            job = session.jobs.popleft()
+            self.queued -= 1
+            session.busy = True
+            self.in_flight += 1
+            task = asyncio.get_running_loop().create_task(self.run_job(session, job))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run_job(self, session, job):
+        op, depth, future, received = job
+        started = time.perf_counter()
+        try:
+            # An earlier queued job may have ended the game
+            if session.game_over:
+                raise ServerError("The game is over.")
+            # Workers get a compact snapshot of the position at dispatch time with
+            # the game's position hashes for repetitions, and the ply since the
+            # snapshot carries no move history
+            search = functools.partial(_search_snapshot, session.board.to_bytes(), tuple(session.board.hash_stack),
+                                       depth, session.to_move, len(session.history) + 1)
+            score, move = await asyncio.get_running_loop().run_in_executor(self.executor, search)
+            finished = time.perf_counter()
+            response = {
+                'move': format_square(move[0]) + format_square(move[1]) if move else None,
+                'score': score,
+                'queue_ms': round((started - received) * 1000, 3),
+                'compute_ms': round((finished - started) * 1000, 3),
+            }
+            if op == 'ai' and move and not session.closed:
+                session.play(*move)
+                response['game_over'] = session.game_over
+                response['winner'] = session.winner
+            self.ai_latency.record(finished - received)
+            if not future.done():
+                future.set_result(response)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self.in_flight -= 1
+            session.busy = False
+            if session.jobs and not session.closed:
+                self.ready.append(session)
+            self.schedule()
+
+    def stats(self):
+        return {
+            'sessions': len(self.sessions),
+            'queued': self.queued,
+            'in_flight': self.in_flight,
+            'workers': self.workers,
+            'requests': self.request_latency.summary(),
+            'ai': self.ai_latency.summary(),
+        }
+
+    async def handle_connection(self, reader, writer):
+        """Serve one client connection; requests on it are processed concurrently."""
+        write_lock = asyncio.Lock()
+        pending = set()
+        owned = set()  # Sessions opened here, closed on disconnect
+
+        async def respond(line):
+            received = time.perf_counter()
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get('id')
+                response = await self.handle_request(request, owned)
+            except ServerError as e:
+                response = {'error': str(e)}
+            except (ValueError, AttributeError):
+                response = {'error': "Malformed request."}
+            except Exception as e:
+                response = {'error': f"Internal error: {e}"}
+            elapsed = time.perf_counter() - received
+            self.request_latency.record(elapsed)
+            response['id'] = request_id
+            response['latency_ms'] = round(elapsed * 1000, 3)
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.get_running_loop().create_task(respond(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                session = self.sessions.get(session_id)
+                if session is not None:
+                    self.close_session(session)
+            writer.close()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        if self.table is not None:
+            self.table.close()
+            self.table.unlink()
+
+
+async def serve(args):
+    server = SessionServer(workers=args.workers, max_pending=args.max_pending,
+                           max_sessions=args.max_sessions, max_depth=args.max_depth)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.handle_connection, path=args.unix)
+        print(f"Serving on {args.unix}")
+    else:
+        listener = await asyncio.start_server(server.handle_connection, args.host, args.port)
+        print(f"Serving on {args.host}:{args.port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many Makruk game sessions.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Listen on a Unix socket path instead of TCP.")
+    parser.add_argument('--workers', type=int, default=2, help="Search processes.")
+    parser.add_argument('--max-pending', type=int, default=4, help="Queued AI requests allowed per session.")
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--max-depth', type=int, default=4)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
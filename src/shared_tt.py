@@ -0,0 +1,126 @@
+# shared_tt.py
+"""
+Transposition table in multiprocessing shared memory.
+
+Every worker process maps the same block of memory, so positions searched
+by one worker are visible to all others. Entries are two 64-bit words,
+(key XOR data, data), written without locks: a reader recomputes the key from
+both words and ignores the entry when it does not match, which also rejects
+entries torn by a concurrent write.
+
+The data word packs the score as a float32 in the low 32 bits, then the
+depth (8 bits), bound flag (2 bits), a has-move bit and the move as two
+6-bit square indices.
+"""
+
+import struct
+from multiprocessing import shared_memory
+
+ENTRY_BYTES = 16
+_MASK64 = (1 << 64) - 1
+
+
+def _pack(depth, flag, score, move):
+    data = struct.unpack('<I', struct.pack('<f', score))[0]
+    data |= (min(depth, 255) & 0xFF) << 32
+    data |= (flag & 0x3) << 40
+    if move is not None:
+        (x1, y1), (x2, y2) = move
+        data |= 1 << 42
+        data |= (x1 * 8 + y1) << 43
+        data |= (x2 * 8 + y2) << 49
+    return data
+
+
+def _unpack(data):
+    score = struct.unpack('<f', struct.pack('<I', data & 0xFFFFFFFF))[0]
+    depth = (data >> 32) & 0xFF
+    flag = (data >> 40) & 0x3
+    move = None
+    if data >> 42 & 1:
+        move = (divmod((data >> 43) & 0x3F, 8), divmod((data >> 49) & 0x3F, 8))
+    return depth, flag, score, move
+
+
+class SharedTranspositionTable:
+    """
+    Fixed-size, lockless transposition table in shared memory.
+
+    Create it once in the parent with SharedTranspositionTable(entries) and
+    attach to it in workers with SharedTranspositionTable.attach(name, entries).
+    The creator must call close() and then unlink() when done. Pool workers
+    can attach with init_worker as the initializer and get it from worker_table().
+    Args:
+        entries (int): Number of entries; rounded up to a power of two.
+        name (str): Name of an existing block to attach to instead of creating one.
+    """
+
+    def __init__(self, entries=1 << 20, name=None):
+        size = 1
+        while size < entries:
+            size <<= 1
+        self.entries = size
+        self.mask = size - 1
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size * ENTRY_BYTES)
+            self.shm.buf[:] = bytes(size * ENTRY_BYTES)
+            self.owner = True
+        else:
+            # Pool workers share the creator's resource tracker, so attaching
+            # does not make the block outlive or vanish with the worker
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.words = self.shm.buf.cast('Q')
+
+    @classmethod
+    def attach(cls, name, entries):
+        return cls(entries, name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def probe(self, key):
+        index = (key & self.mask) << 1
+        words = self.words
+        check = words[index]
+        data = words[index + 1]
+        if check ^ data != key or not data:
+            return None
+        return _unpack(data)
+
+    def store(self, key, depth, flag, score, move):
+        index = (key & self.mask) << 1
+        words = self.words
+        data = words[index + 1]
+        # Keep a deeper result for the same position
+        if data and words[index] ^ data == key and (data >> 32) & 0xFF > depth:
+            return
+        data = _pack(depth, flag, score, move)
+        words[index] = (key ^ data) & _MASK64
+        words[index + 1] = data
+
+    def clear(self):
+        self.shm.buf[:] = bytes(self.entries * ENTRY_BYTES)
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self.shm.unlink()
+
+
+_worker_table = None
+
+
+def init_worker(name, entries):
+    """ProcessPoolExecutor initializer attaching a worker to a table created in the parent."""
+    global _worker_table
+    _worker_table = SharedTranspositionTable.attach(name, entries)
+
+
+def worker_table():
+    """The table init_worker attached in this process, or None."""
+    return _worker_table
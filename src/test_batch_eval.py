@@ -0,0 +1,61 @@
+# test_batch_eval.py
+"""
+Tests that evaluate_batch matches Board.evaluate_board within TOLERANCE.
+Skipped when NumPy is not installed.
+"""
+
+import random
+import unittest
+
+from board import Board
+
+try:
+    import batch_eval
+except ImportError:  # NumPy is optional
+    batch_eval = None
+
+
+def random_play_boards(games=10, plies=80, seed=0):
+    """Boards from every ply of seeded random games, captures and promotions included."""
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(games):
+        board = Board()
+        color = 'white'
+        for _ in range(plies):
+            moves = board.get_all_possible_moves(color)
+            if not moves or board.is_game_over()[0]:
+                break
+            board.move_piece(*rng.choice(moves))
+            boards.append(Board.from_bytes(board.to_bytes()))
+            color = 'black' if color == 'white' else 'white'
+    return boards
+
+
+@unittest.skipIf(batch_eval is None, "NumPy is not installed")
+class EvaluateBatchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.boards = random_play_boards()
+        cls.packed = batch_eval.pack_boards(cls.boards)
+
+    def check(self, include_mobility):
+        scores = batch_eval.evaluate_batch(self.packed, include_mobility)
+        for board, score in zip(self.boards, scores):
+            self.assertAlmostEqual(score, board.evaluate_board(include_mobility), delta=batch_eval.TOLERANCE)
+
+    def test_with_mobility(self):
+        self.check(True)
+
+    def test_without_mobility(self):
+        self.check(False)
+
+    def test_chunks(self):
+        whole = batch_eval.evaluate_batch(self.packed)
+        chunked = batch_eval.evaluate_batch(self.packed, chunk_size=7)
+        self.assertTrue((whole == chunked).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# test_board.py
+"""
+Tests for the counting rules and for Board state surviving make/unmake and
+snapshots. Run with python -m pytest (or python -m unittest) from src.
+"""
+
+import unittest
+
+from board import Board, BOARD_HONOUR_LIMIT
+from pieces import Khun, Bia
+
+
+def board_state(board):
+    """Everything move_piece changes and undo_move must restore."""
+    return {
+        'grid': [[(type(piece), piece.color) if piece else None for piece in row] for row in board.grid],
+        'pieces': {color: [(position, type(piece)) for position, piece in pieces.items()]
+                   for color, pieces in board.pieces.items()},
+        'position_hash': board.position_hash,
+        'bia_counts': dict(board.bia_counts),
+        'hash_stack': list(board.hash_stack),
+        'hash_counts': dict(board.hash_counts),
+        'counting': board.counting,
+        'count': board.count,
+        'khun_positions': dict(board.khun_positions),
+    }
+
+
+def rook_ending():
+    """White Khun and Rua against Black Khun and Ma, White to move; Rua takes Ma with (4, 0) -> (4, 5)."""
+    board, _ = Board.from_fen('4k3/8/8/8/R4n2/8/8/4K3 w')
+    return board
+
+
+class CountingTest(unittest.TestCase):
+
+    def test_no_count_while_bia_remain(self):
+        self.assertIsNone(Board().counting)
+
+    def test_board_honour(self):
+        board = rook_ending()
+        self.assertEqual(board.counting, ('board', 'white', BOARD_HONOUR_LIMIT))
+        self.assertEqual(board.count, 0)
+
+    def test_pieces_honour_rua(self):
+        board = rook_ending()
+        board.move_piece((4, 0), (4, 5))
+        # Black is left with a bare Khun against Khun and Rua
+        self.assertEqual(board.counting, ('pieces', 'black', 16))
+        # The count starts at the number of pieces on the board
+        self.assertEqual(board.count, 3)
+        board.move_piece((0, 4), (0, 3))
+        self.assertEqual(board.count, 4)
+
+    def test_undo_restores_count(self):
+        board = rook_ending()
+        before = board_state(board)
+        board.move_piece((4, 0), (4, 5))
+        board.move_piece((0, 4), (0, 3))
+        board.undo_move()
+        board.undo_move()
+        self.assertEqual(board_state(board), before)
+
+
+class MakeUnmakeTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        board = Board()
+        # Bia moves, then a capture, on both sides
+        moves = [((5, 3), (4, 3)), ((2, 4), (3, 4)), ((4, 3), (3, 4)), ((2, 5), (3, 5))]
+        states = [board_state(board)]
+        for move in moves:
+            success, result = board.move_piece(*move)
+            self.assertTrue(success, result)
+            states.append(board_state(board))
+        self.assertEqual(board.bia_counts, {'white': 8, 'black': 7})
+        for state in reversed(states[:-1]):
+            board.undo_move()
+            self.assertEqual(board_state(board), state)
+
+    def test_promotion_round_trip(self):
+        board = Board(setup=False)
+        board.place_piece(Khun('white'), (7, 4))
+        board.place_piece(Bia('white'), (1, 0))
+        board.place_piece(Khun('black'), (0, 7))
+        board.record_position('white')
+        before = board_state(board)
+        board.move_piece((1, 0), (0, 0))
+        self.assertEqual(board.bia_counts['white'], 0)
+        self.assertIsNotNone(board.counting)
+        board.undo_move()
+        self.assertEqual(board_state(board), before)
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def test_bytes_round_trip(self):
+        board = rook_ending()
+        board.move_piece((4, 0), (4, 5))
+        copy = Board.from_bytes(board.to_bytes())
+        self.assertEqual(copy.to_bytes(), board.to_bytes())
+        self.assertEqual(copy.get_board_state(), board.get_board_state())
+        self.assertEqual(copy.position_hash, board.position_hash)
+        self.assertEqual((copy.counting, copy.count), (board.counting, board.count))
+        self.assertEqual(copy.last_move, board.last_move)
+
+
+if __name__ == "__main__":
+    unittest.main()
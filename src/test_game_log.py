@@ -0,0 +1,80 @@
+# test_game_log.py
+"""
+Tests for writing, reading and recovering binary game logs.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from board import Board
+from game_log import GameLog, GameLogWriter, HEADER, INDEX_ENTRY, MOVE_BYTES
+
+OPENING = [((5, 4), (4, 4)), ((2, 3), (3, 3)), ((4, 4), (3, 3))]
+
+
+class GameLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'games.mklog')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, *games):
+        writer = GameLogWriter(self.path)
+        try:
+            for moves, result in games:
+                writer.write_game(moves, result)
+        finally:
+            writer.close()
+
+    def read(self):
+        log = GameLog(self.path)
+        try:
+            return [(log.moves(game), log.result(game)) for game in range(len(log))]
+        finally:
+            log.close()
+
+    def test_round_trip(self):
+        games = [(OPENING, 'white'), ([], 'unfinished'), (OPENING[:2], 'draw')]
+        self.write(*games)
+        self.assertEqual(self.read(), games)
+
+    def test_replay(self):
+        self.write((OPENING, 'draw'))
+        board = Board()
+        for move in OPENING:
+            board.move_piece(*move)
+        log = GameLog(self.path)
+        try:
+            positions = [(ply, position.to_bytes()) for ply, position in log.replay(0)]
+        finally:
+            log.close()
+        self.assertEqual(len(positions), len(OPENING) + 1)
+        self.assertEqual(positions[-1], (len(OPENING), board.to_bytes()))
+
+    def test_torn_tails_trimmed_on_append(self):
+        self.write((OPENING, 'white'))
+        # An interrupted write left half a move record and part of an index entry
+        with open(self.path, 'ab') as f:
+            f.write(b'\x01')
+        with open(self.path + '.idx', 'ab') as f:
+            f.write(b'\x02' * 5)
+        self.assertEqual(self.read(), [(OPENING, 'white')])
+        self.write((OPENING[:1], 'black'))
+        self.assertEqual(self.read(), [(OPENING, 'white'), (OPENING[:1], 'black')])
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + 4 * MOVE_BYTES)
+        self.assertEqual(os.path.getsize(self.path + '.idx'), HEADER.size + 2 * INDEX_ENTRY.size)
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a game log')
+        with self.assertRaises(ValueError):
+            GameLogWriter(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+# test_search.py
+"""
+Tests for repetition draws in search, across snapshots and around null moves.
+"""
+
+import unittest
+
+from board import Board, DRAW_SCORE
+from search import Searcher
+from session_server import Session
+from variants import MakrukPosition
+
+# Both sides shuffle back to the start of the game
+SHUFFLE = [((7, 1), (5, 2)), ((0, 4), (1, 4)), ((5, 2), (7, 1)), ((1, 4), (0, 4))]
+
+
+def shuffled_ending():
+    """White Khun and Ma against Khun and two Rua, after SHUFFLE: Ma (7, 1) -> (5, 2) now repeats a position."""
+    board, _ = Board.from_fen('r3k2r/8/8/8/8/8/8/1N2K3 w')
+    for move in SHUFFLE:
+        board.move_piece(*move)
+    return board
+
+
+class RepetitionTest(unittest.TestCase):
+
+    def test_losing_side_repeats(self):
+        board = shuffled_ending()
+        for depth in (1, 2, 3):
+            self.assertEqual(Searcher(board).search(depth, 'white'), (DRAW_SCORE, ((7, 1), (5, 2))))
+
+    def test_snapshot_keeps_history(self):
+        board = shuffled_ending()
+        copy = Board.from_bytes(board.to_bytes(), board.hash_stack)
+        self.assertEqual(Searcher(copy).search(2, 'white')[0], DRAW_SCORE)
+        # Without the history the repetition is not seen
+        self.assertLess(Searcher(Board.from_bytes(board.to_bytes())).search(2, 'white')[0], DRAW_SCORE)
+
+    def test_no_repetition_across_null_move(self):
+        board, _ = Board.from_fen('r3k2r/8/8/8/8/8/8/1N2K3 w')
+        position = MakrukPosition(board)
+        position.make(((7, 1), (5, 2)))
+        position.make_null()
+        position.make(((5, 2), (7, 1)))
+        position.make_null()
+        # Same placement and side to move as after the first move, but only through passes
+        position.make(((7, 1), (5, 2)))
+        self.assertFalse(position.is_repetition())
+        position.unmake()
+        position.unmake_null()
+        position.unmake()
+        position.unmake_null()
+        position.unmake()
+        self.assertEqual(board.hash_counts, {board.hash_stack[0]: 1})
+
+    def test_session_threefold(self):
+        session = Session(1)
+        shuffle = [((7, 1), (6, 3)), ((0, 1), (1, 3)), ((6, 3), (7, 1)), ((1, 3), (0, 1))]
+        for move in shuffle * 2:
+            self.assertFalse(session.game_over)
+            session.play(*move)
+        self.assertTrue(session.game_over)
+        self.assertIsNone(session.winner)
+
+
+if __name__ == "__main__":
+    unittest.main()
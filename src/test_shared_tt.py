@@ -0,0 +1,54 @@
+# test_shared_tt.py
+"""
+Tests for the lockless shared-memory transposition table.
+"""
+
+import unittest
+
+from shared_tt import SharedTranspositionTable, _pack
+
+
+class SharedTranspositionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = SharedTranspositionTable(16)
+
+    def tearDown(self):
+        self.table.close()
+        self.table.unlink()
+
+    def test_store_and_probe(self):
+        move = ((6, 4), (5, 4))
+        self.table.store(0x1234, 3, 1, 0.5, move)
+        self.assertEqual(self.table.probe(0x1234), (3, 1, 0.5, move))
+        self.assertIsNone(self.table.probe(0x1235))
+
+    def test_other_key_in_slot(self):
+        self.table.store(0x1234, 3, 1, 0.5, None)
+        # Same slot (low bits), different position
+        self.assertIsNone(self.table.probe(0x1234 + (1 << 40)))
+
+    def test_torn_entry_rejected(self):
+        key = 0x1234
+        self.table.store(key, 3, 1, 0.5, None)
+        index = (key & self.table.mask) << 1
+        # A concurrent writer replaced the data word but not yet the check word
+        self.table.words[index + 1] = _pack(5, 0, -2.0, ((1, 1), (2, 2)))
+        self.assertIsNone(self.table.probe(key))
+
+    def test_keeps_deeper_entry(self):
+        self.table.store(0x1234, 5, 1, 0.5, None)
+        self.table.store(0x1234, 2, 1, -1.0, None)
+        self.assertEqual(self.table.probe(0x1234), (5, 1, 0.5, None))
+
+    def test_attach_sees_stores(self):
+        other = SharedTranspositionTable.attach(self.table.name, self.table.entries)
+        try:
+            self.table.store(0x42, 4, 2, 1.25, None)
+            self.assertEqual(other.probe(0x42), (4, 2, 1.25, None))
+        finally:
+            other.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
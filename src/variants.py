@@ -0,0 +1,360 @@
+# variants.py
+"""
+Rule-set adapters for the variant-agnostic search in search.py.
+
+Searcher only talks to a position through the methods below, so every
+search feature works for each rule set that implements them:
+
+    key(color)              transposition table key with color to move (and anything else scores depend on)
+    legal_moves(color)      moves for color, in any hashable form
+    tactical_moves(color)   the captures and promotions among them
+    is_legal(move, color)   whether a move (e.g. from the table) is playable
+    make(move), unmake()    play and take back a move
+    is_repetition()         whether the position occurred before in the game or search path
+    make_null(), unmake_null()  pass the turn, for null-move pruning
+    null_move_allowed(color)    False where passing is unsound (zugzwang, check)
+    outcome()               (game over, winner or None for a draw), without move generation
+    evaluate()              static score from White's perspective
+    eval_key()              hash of everything evaluate() depends on
+    no_moves_score(color, ply)  score for color to move with no legal moves, ply plies from the root
+    MATE_SCORE              score of a mate at the root, or None if the rules have no mate scores
+    capture_values(move)    (captured value, moving piece value) for move ordering
+    is_quiet(move)          neither a capture nor a promotion
+    see(move)               static exchange evaluation of a capture
+    mark(), unwind(mark)    restore the position after an interrupted search
+
+MakrukPosition wraps a Board from board.py; ChessPosition wraps a Position
+from chess_position.py, which lives at the repository root next to the
+chess GUI and is only needed when chess is searched.
+"""
+
+from board import PIECE_VALUES, DRAW_SCORE, SIDE_KEYS
+from pieces import Met, Rua, Bia
+
+try:
+    import chess_position as cp
+except ImportError:  # Not on the path when only Makruk is used
+    cp = None
+
+OPPONENT = {'white': 'black', 'black': 'white'}
+
+
+class SearchPosition:
+    """Static exchange evaluation shared by the adapters."""
+
+    MATE_SCORE = None
+
+    def see(self, move):
+        """
+        Static exchange evaluation: the material balance for the side making
+        move once both sides have recaptured on its target square with their
+        least valuable pieces for as long as that pays.
+        Args:
+            move: A capture or promotion.
+        Returns:
+            float: Material gained (negative if the exchange loses material).
+        """
+        gain = self.exchange_gain(move)
+        color = self.mover(move)
+        self.make(move)
+        if not self.outcome()[0]:
+            gain -= self._recapture(self.target(move), OPPONENT[color])
+        self.unmake()
+        return gain
+
+    def _recapture(self, square, color):
+        """Best material color can win by continuing the exchange on square (never negative)."""
+        move = self.least_valuable_attacker(square, color)
+        if move is None:
+            return 0
+        gain = self.exchange_gain(move)
+        self.make(move)
+        if not self.outcome()[0]:
+            gain -= self._recapture(square, OPPONENT[color])
+        self.unmake()
+        return max(0, gain)
+
+
+class MakrukPosition(SearchPosition):
+    """
+    Search adapter for a Makruk Board.
+    Args:
+        board (Board): The board, searched in place.
+    """
+
+    PROMOTION_GAIN = PIECE_VALUES[Met] - PIECE_VALUES[Bia]
+
+    def __init__(self, board):
+        self.board = board
+        # (moves played, repetition counts) saved by each null move in progress
+        self.null_stack = []
+
+    def key(self, color):
+        # The counting state is part of the key: the same placement can be
+        # drawn by the count in one line and playable in another
+        board = self.board
+        return board.position_hash ^ SIDE_KEYS[color] ^ board.counting_key()
+
+    def legal_moves(self, color):
+        return self.board.get_all_possible_moves(color)
+
+    def tactical_moves(self, color):
+        grid = self.board.grid
+        return [move for move in self.board.get_all_possible_moves(color)
+                if grid[move[1][0]][move[1][1]] is not None or self.is_promotion(move)]
+
+    def is_legal(self, move, color):
+        (x1, y1), to_pos = move
+        piece = self.board.grid[x1][y1]
+        return piece is not None and piece.color == color and to_pos in piece.get_possible_moves(self.board, (x1, y1))
+
+    def make(self, move):
+        self.board.move_piece(move[0], move[1])
+
+    def unmake(self):
+        self.board.undo_move()
+
+    def is_repetition(self):
+        return self.board.repetitions() > 1
+
+    def make_null(self):
+        # A pass is not a real move, so positions below it must not count as
+        # repeating ones from before it: give them fresh repetition counts
+        board = self.board
+        self.null_stack.append((len(board.move_stack), board.hash_counts))
+        board.hash_counts = {}
+
+    def unmake_null(self):
+        self.board.hash_counts = self.null_stack.pop()[1]
+
+    def null_move_allowed(self, color):
+        # Bare Khun endings are full of zugzwang
+        pieces = self.board.pieces
+        return len(pieces['white']) > 1 and len(pieces['black']) > 1
+
+    def outcome(self):
+        return self.board.is_game_over()
+
+    def evaluate(self):
+        return self.board.evaluate_board()
+
+    def eval_key(self):
+        return self.board.position_hash
+
+    def no_moves_score(self, color, ply):
+        return (1 if color == 'white' else -1) * self.board.evaluate_board()
+
+    def capture_values(self, move):
+        (x1, y1), (x2, y2) = move
+        grid = self.board.grid
+        target = grid[x2][y2]
+        return (PIECE_VALUES[type(target)] if target is not None else 0), PIECE_VALUES[type(grid[x1][y1])]
+
+    def is_promotion(self, move):
+        (x1, y1), (x2, _) = move
+        piece = self.board.grid[x1][y1]
+        return isinstance(piece, Bia) and x2 == (0 if piece.color == 'white' else 7)
+
+    def is_quiet(self, move):
+        x2, y2 = move[1]
+        return self.board.grid[x2][y2] is None and not self.is_promotion(move)
+
+    def mover(self, move):
+        return self.board.grid[move[0][0]][move[0][1]].color
+
+    def target(self, move):
+        return move[1]
+
+    def exchange_gain(self, move):
+        """Material won by playing move, counting promotion, before any reply."""
+        x2, y2 = move[1]
+        target = self.board.grid[x2][y2]
+        gain = PIECE_VALUES[type(target)] if target is not None else 0
+        return gain + self.PROMOTION_GAIN if self.is_promotion(move) else gain
+
+    def least_valuable_attacker(self, square, color):
+        """color's capture on square with its cheapest piece, or None."""
+        x2, y2 = square
+        best = None
+        best_value = float('inf')
+        board = self.board
+        for (x, y), piece in board.pieces[color].items():
+            value = PIECE_VALUES[type(piece)]
+            if value >= best_value:
+                continue
+            # Only a Rua reaches further than two squares
+            if isinstance(piece, Rua):
+                if x != x2 and y != y2:
+                    continue
+            elif abs(x - x2) > 2 or abs(y - y2) > 2:
+                continue
+            if square in piece.get_possible_moves(board, (x, y)):
+                best, best_value = ((x, y), square), value
+        return best
+
+    def mark(self):
+        return len(self.board.move_stack), len(self.null_stack)
+
+    def unwind(self, mark):
+        length, nulls = mark
+        board = self.board
+        while len(board.move_stack) > length or len(self.null_stack) > nulls:
+            # Take back moves and null moves in the order they were made
+            if len(self.null_stack) > nulls and self.null_stack[-1][0] == len(board.move_stack):
+                self.unmake_null()
+            else:
+                board.undo_move()
+
+
+class ChessPosition(SearchPosition):
+    """
+    Search adapter for a chess Position. Moves are (from_square, to_square)
+    pairs; pawns reaching the last row promote to a queen.
+    Args:
+        position (Position): The position, searched in place; a new game if omitted.
+        history (iterable): Hashes of the earlier positions of the game, for
+            repetition detection.
+    """
+
+    PIECE_VALUES = (0, 1, 3, 3, 5, 9, 1000)  # Indexed by piece kind
+    MATE_SCORE = 1000
+    CENTER_BONUS = 0.1  # For knights, bishops and pawns on the central 4x4 squares
+
+    def __init__(self, position=None, history=()):
+        if cp is None:
+            raise ImportError("chess_position is not importable; put the repository root on sys.path.")
+        self.position = position if position is not None else cp.Position()
+        self.undo_stack = []
+        self.null_stack = []  # As in MakrukPosition
+        # Position.hash includes the side to move and castling rights
+        self.hash_counts = {}
+        for key in (*history, self.position.hash):
+            self.hash_counts[key] = self.hash_counts.get(key, 0) + 1
+
+    @staticmethod
+    def is_white(color):
+        return color == 'white'
+
+    def key(self, color):
+        return self.position.hash
+
+    def legal_moves(self, color):
+        return [(from_sq, to_sq) for from_sq, targets in self.position.legal_moves().items() for to_sq in targets]
+
+    def tactical_moves(self, color):
+        return [move for move in self.legal_moves(color) if not self.is_quiet(move)]
+
+    def is_legal(self, move, color):
+        from_sq, to_sq = move
+        piece = self.position.squares[from_sq]
+        return piece != cp.EMPTY and (piece > 0) == self.is_white(color) \
+            and to_sq in self.position.legal_moves_from(from_sq)
+
+    def make(self, move):
+        self.undo_stack.append(self.position.make_move(move[0], move[1]))
+        key = self.position.hash
+        self.hash_counts[key] = self.hash_counts.get(key, 0) + 1
+
+    def unmake(self):
+        self.hash_counts[self.position.hash] -= 1
+        self.position.unmake_move(self.undo_stack.pop())
+
+    def is_repetition(self):
+        return self.hash_counts[self.position.hash] > 1
+
+    def make_null(self):
+        position = self.position
+        position.white_to_move = not position.white_to_move
+        position.hash ^= cp.BLACK_TO_MOVE_KEY
+        # Positions below a pass must not repeat ones from before it
+        self.null_stack.append((len(self.undo_stack), self.hash_counts))
+        self.hash_counts = {}
+
+    def unmake_null(self):
+        position = self.position
+        position.white_to_move = not position.white_to_move
+        position.hash ^= cp.BLACK_TO_MOVE_KEY
+        self.hash_counts = self.null_stack.pop()[1]
+
+    def null_move_allowed(self, color):
+        # Not in check, and with pieces besides pawns to avoid pawn-ending zugzwang
+        white = self.is_white(color)
+        position = self.position
+        if position.in_check(white):
+            return False
+        return any(piece != cp.EMPTY and (piece > 0) == white and abs(piece) not in (cp.PAWN, cp.KING)
+                   for piece in position.squares)
+
+    def outcome(self):
+        # Checkmate and stalemate need move generation, see no_moves_score
+        return False, None
+
+    def evaluate(self):
+        total = 0
+        values = self.PIECE_VALUES
+        for sq, piece in enumerate(self.position.squares):
+            if piece == cp.EMPTY:
+                continue
+            kind = abs(piece)
+            value = values[kind] if kind != cp.KING else 0
+            row, col = divmod(sq, 8)
+            if kind in (cp.PAWN, cp.KNIGHT, cp.BISHOP) and 2 <= row <= 5 and 2 <= col <= 5:
+                value += self.CENTER_BONUS
+            total += value if piece > 0 else -value
+        return total
+
+    def eval_key(self):
+        return self.position.hash
+
+    def no_moves_score(self, color, ply):
+        if self.position.in_check(self.is_white(color)):
+            # Nearer mates score higher, so the search plays the quickest one
+            return -(self.MATE_SCORE - ply)
+        return DRAW_SCORE
+
+    def capture_values(self, move):
+        squares = self.position.squares
+        return self.PIECE_VALUES[abs(squares[move[1]])], self.PIECE_VALUES[abs(squares[move[0]])]
+
+    def is_promotion(self, move):
+        return abs(self.position.squares[move[0]]) == cp.PAWN and move[1] // 8 in (0, 7)
+
+    def is_quiet(self, move):
+        return self.position.squares[move[1]] == cp.EMPTY and not self.is_promotion(move)
+
+    def mover(self, move):
+        return 'white' if self.position.squares[move[0]] > 0 else 'black'
+
+    def target(self, move):
+        return move[1]
+
+    def exchange_gain(self, move):
+        gain = self.PIECE_VALUES[abs(self.position.squares[move[1]])]
+        if self.is_promotion(move):
+            gain += self.PIECE_VALUES[cp.QUEEN] - self.PIECE_VALUES[cp.PAWN]
+        return gain
+
+    def least_valuable_attacker(self, square, color):
+        """color's capture on square with its cheapest piece (ignoring pins), or None."""
+        white = self.is_white(color)
+        position = self.position
+        best = None
+        best_value = float('inf')
+        for sq, piece in enumerate(position.squares):
+            if piece == cp.EMPTY or (piece > 0) != white:
+                continue
+            value = self.PIECE_VALUES[abs(piece)]
+            if value < best_value and square in position.threat_squares(sq):
+                best, best_value = (sq, square), value
+        return best
+
+    def mark(self):
+        return len(self.undo_stack), len(self.null_stack)
+
+    def unwind(self, mark):
+        length, nulls = mark
+        while len(self.undo_stack) > length or len(self.null_stack) > nulls:
+            if len(self.null_stack) > nulls and self.null_stack[-1][0] == len(self.undo_stack):
+                self.unmake_null()
+            else:
+                self.unmake()